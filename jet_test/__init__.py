@@ -1,3 +1,5 @@
 import importlib.metadata
 
-__version__ = importlib.metadata.version("jet-test")
\ No newline at end of file
+from jet_test.marks import timeout, threaded, budget, fixture
+
+__version__ = importlib.metadata.version("jet-test")
@@ -0,0 +1,71 @@
+"""Async tests.
+Runs `async def` tests as tasks on one event loop, up to a number of them at a time, so
+I/O bound tests overlap instead of waiting for each other. Every task has its own output
+capture and its own failure snapshot.
+"""
+# standard imports
+import asyncio
+import io
+from typing import Iterator
+
+# self imports
+import jet_test.runner as runner
+import jet_test.capture as capture
+import jet_test.fixtures as fixtures
+from jet_test.classes import Test, Error
+
+# tests running at the same time unless --async-limit says otherwise
+LIMIT = 100
+
+
+async def _evaluate(test: Test, logs: str | None) -> Error:
+    test, error = runner._prepare(test)
+    if error is not None:
+        return error
+    output = io.StringIO()
+    capture.context_output.set(output)
+    # other tasks run on the same thread meanwhile, so cpu time says nothing here
+    stopwatch = runner.Stopwatch(clock=None)
+    used = fixtures.Fixtures(test)
+    try:
+        with used, stopwatch:
+            await test.routine(**used.kwargs)
+    except Exception as exception:
+        return runner._verdict(test, exception, output, logs, stopwatch, used)
+    return runner._verdict(test, None, output, logs, stopwatch, used)
+
+
+def run_async(
+    tests: list[Test], limit: int = LIMIT, logs: str | None = None
+) -> Iterator[tuple[Test, Error]]:
+    """Yields (test, error) pairs in order of completion.
+    New tasks are only created as others finish, so a large suite is never all in memory.
+    """
+    if not tests:
+        return
+    loop = asyncio.new_event_loop()
+    queue = iter(tests)
+    running = {}
+    try:
+        with capture.ContextCapture():
+            while True:
+                for test in queue:
+                    # every task runs in a copy of the context, with its own capture
+                    running[loop.create_task(_evaluate(test, logs))] = test
+                    if len(running) >= limit:
+                        break
+                if not running:
+                    break
+                done, _ = loop.run_until_complete(
+                    asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                )
+                for task in done:
+                    yield running.pop(task), task.result()
+    finally:
+        # a run stopped early leaves tasks behind
+        for task in running:
+            task.cancel()
+        if running:
+            loop.run_until_complete(asyncio.wait(running))
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
@@ -0,0 +1,238 @@
+"""Benchmarks.
+`jet bench` collects bench_* functions from bench_*.py and test_*.py modules, the same
+way `jet run` collects tests, and times them: a calibration finds how many calls make a
+round long enough for the clock, warmup rounds are thrown away, then every timed round
+gives the mean time of one call. The garbage collector is off while timing unless asked
+otherwise, and the process can be pinned to a single cpu.
+Results are compared to a baseline file, and a benchmark whose median got slower by more
+than the threshold, and by more than its spread, counts as a regression.
+"""
+# standard imports
+import gc
+import inspect
+import json
+import math
+import os
+import statistics
+import time
+from contextlib import redirect_stdout
+
+# self imports
+import jet_test.runner as runner
+from jet_test.seer import display_bench
+from jet_test.writers import BENCH_FILE
+from jet_test.classes import BenchConfig, JetError, Test, Module
+
+# dependencies
+from rich.console import Console
+
+BASELINE_FILE = "jet.bench.baseline.json"
+
+
+def _key(test: Test, path: str) -> str:
+    # relative, so the baseline can be shared between checkouts and machines
+    return f"{os.path.relpath(test.module.path, path)}::{test.name}"
+
+
+def get_benchmarks(modules: list[Module]) -> list[Test]:
+    benchmarks = []
+    for module in modules:
+        for key, value in inspect.getmembers(module.module, inspect.isroutine):
+            if not key.startswith("bench"):
+                continue
+            name = runner._clean_name(value.__name__.removeprefix("bench_"))
+            benchmarks.append(
+                Test(
+                    name=name,
+                    doc=value.__doc__ if value.__doc__ is not None else name,
+                    routine=value,
+                    module=Module(name=module.name, doc=module.doc, path=module.path),
+                )
+            )
+    return benchmarks
+
+
+def _round(routine, number: int) -> float:
+    """Seconds taken by `number` back to back calls."""
+    calls = range(number)
+    start = time.perf_counter()
+    for _ in calls:
+        routine()
+    return time.perf_counter() - start
+
+
+def calibrate(routine, min_time: float) -> int:
+    """Number of calls per round that makes a round last at least `min_time` seconds."""
+    number = 1
+    while (elapsed := _round(routine, number)) < min_time:
+        if elapsed <= 0:
+            number *= 100
+            continue
+        # aim a bit past min_time, growing at least 2x and at most 100x per step
+        target = math.ceil(number * min_time / elapsed * 1.2)
+        number = min(number * 100, max(number * 2, target))
+    return number
+
+
+def measure(
+    routine, rounds: int, warmup: int, min_time: float
+) -> tuple[int, list[float]]:
+    """Calls per round and the time of one call in each timed round."""
+    number = calibrate(routine, min_time)
+    for _ in range(warmup):
+        _round(routine, number)
+    return number, [_round(routine, number) / number for _ in range(rounds)]
+
+
+def _stats(times: list[float]) -> dict:
+    if len(times) > 1:
+        q1, _, q3 = statistics.quantiles(times, n=4, method="inclusive")
+    else:
+        q1 = q3 = times[0]
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "iqr": q3 - q1,
+        "mean": statistics.fmean(times),
+    }
+
+
+def _compare(
+    stats: dict, baseline: dict | None, threshold: float
+) -> tuple[float | None, str]:
+    """Relative change of the median against the baseline, and the status it gives."""
+    if baseline is None or baseline["median"] <= 0:
+        return None, "Pass"
+    change = stats["median"] / baseline["median"] - 1
+    # slower than the threshold, and by more than the noise of either measurement
+    noise = max(stats["iqr"], baseline["iqr"])
+    if change > threshold and stats["median"] - baseline["median"] > noise:
+        return change, "Regressed"
+    return change, "Pass"
+
+
+def run_benchmark(test: Test, config: BenchConfig, baseline: dict | None) -> dict:
+    entry = {
+        "name": test.name,
+        "doc": test.doc,
+        "module": test.module.name,
+        "path": test.module.path,
+    }
+    if inspect.iscoroutinefunction(test.routine):
+        error = "Async benchmarks are not supported"
+        return entry | {"type": "Error", "error": error}
+    try:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            gc.collect()
+            if not config.gc:
+                gc.disable()
+            try:
+                number, times = measure(
+                    test.routine, config.rounds, config.warmup, config.min_time
+                )
+            finally:
+                gc.enable()
+    except Exception as exception:
+        error = f"{type(exception).__name__}: {exception}"
+        return entry | {"type": "Error", "error": error}
+    stats = _stats(times)
+    change, status = _compare(stats, baseline, config.threshold)
+    return entry | stats | {
+        "type": status,
+        "rounds": len(times),
+        "number": number,
+        "times": times,
+        "baseline": None if baseline is None else baseline["median"],
+        "change": change,
+    }
+
+
+def load_baseline(path: str) -> dict:
+    try:
+        with open(os.path.join(path, BASELINE_FILE), "r") as fp:
+            return json.load(fp)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _dump(data: dict, filename: str) -> None:
+    with open(filename + ".tmp", "w") as fp:
+        json.dump(data, fp, indent=1)
+    os.replace(filename + ".tmp", filename)
+
+
+def save_baseline(path: str, keys: list[str], entries: list[dict]) -> None:
+    """Stores the timings of the benchmarks that ran, keeping those of the others."""
+    baseline = load_baseline(path)
+    for key, entry in zip(keys, entries):
+        if entry["type"] != "Error":
+            baseline[key] = {k: entry[k] for k in ("min", "median", "iqr")}
+    _dump(baseline, os.path.join(path, BASELINE_FILE))
+
+
+def build_summary(entries: list[dict], color_dict: dict) -> str:
+    s = f"JET: {len(entries)} benchmarks"
+    for status in ["Regressed", "Error"]:
+        n = sum(entry["type"] == status for entry in entries)
+        if n:
+            color = color_dict[status]
+            s += f", [{color}]{n} {status.lower()}[/{color}]"
+    return s
+
+
+class _Pinned:
+    """Keeps the process on a single cpu, and gives it back its cpus on exit."""
+
+    def __init__(self, cpu: int | None):
+        self.cpu = cpu
+
+    def __enter__(self):
+        if self.cpu is None:
+            return self
+        if not hasattr(os, "sched_setaffinity"):
+            raise JetError("--pin needs cpu affinity, not available on this platform")
+        self.cpus = os.sched_getaffinity(0)
+        try:
+            os.sched_setaffinity(0, {self.cpu})
+        except OSError:
+            cpus = sorted(self.cpus)
+            raise JetError(f"Cannot pin to cpu {self.cpu}, available cpus: {cpus}")
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.cpu is not None:
+            os.sched_setaffinity(0, self.cpus)
+
+
+def Bench(config: BenchConfig) -> bool:
+    """Runs the benchmarks, returns False when one regressed or raised."""
+    color_dict = {
+        "Pass": config.pass_color,
+        "Regressed": config.failed_color,
+        "Error": config.error_color,
+    }
+    console = Console()
+    modules = runner.get_modules(config.path, config.files, prefix=("test_", "bench_"))
+    benchmarks = get_benchmarks(modules)
+    if not benchmarks:
+        raise JetError(f"No bench_ functions found in {config.path}")
+
+    baseline = load_baseline(config.path)
+    keys = [_key(test, config.path) for test in benchmarks]
+    entries = []
+    with _Pinned(config.pin):
+        for key, test in zip(keys, benchmarks):
+            with console.status(f"{test.name} @ {test.module.name}"):
+                entries.append(run_benchmark(test, config, baseline.get(key)))
+
+    bench = {
+        "summary": build_summary(entries, color_dict),
+        "threshold": config.threshold,
+        "benchmarks": entries,
+    }
+    _dump(bench, os.path.join(config.path, BENCH_FILE))
+    if config.save_baseline or not baseline:
+        save_baseline(config.path, keys, entries)
+
+    display_bench(bench, color_dict, console)
+    return all(entry["type"] == "Pass" for entry in entries)
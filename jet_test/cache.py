@@ -0,0 +1,165 @@
+"""Result cache.
+Fingerprints tests by their source, their module, the jet_fixtures.py beside it and the
+project modules these import, so tests that passed with the same fingerprint can be
+skipped.
+"""
+# standard imports
+import ast
+import hashlib
+import json
+import os
+
+CACHE_FILE = "jet.cache.json"
+
+# shared fixtures of the test modules of a directory
+FIXTURES_FILE = "jet_fixtures.py"
+
+_SKIP_DIRS = {"__pycache__", "site-packages", "node_modules", "venv", "build", "dist"}
+
+_hashes = {}
+_imports = {}
+_closures = {}
+
+
+def _hash_file(path: str) -> str:
+    if path not in _hashes:
+        with open(path, "rb") as file:
+            _hashes[path] = hashlib.sha1(file.read()).hexdigest()
+    return _hashes[path]
+
+
+def _parse(path: str) -> ast.Module | None:
+    try:
+        with open(path, "rb") as file:
+            return ast.parse(file.read(), filename=path)
+    except (SyntaxError, ValueError, OSError):
+        return None
+
+
+def _module_files(root: str, parts: list[str]) -> list[str]:
+    """Files executed when importing the dotted module `parts` from `root`."""
+    files = []
+    for i in range(1, len(parts) + 1):
+        package = os.path.join(root, *parts[:i])
+        if os.path.isfile(package + "/__init__.py"):
+            files.append(package + "/__init__.py")
+        elif i == len(parts) and os.path.isfile(package + ".py"):
+            files.append(package + ".py")
+        else:
+            break
+    return files
+
+
+def _local_imports(path: str, roots: list[str]) -> list[str]:
+    """Project files imported directly by the module at `path`."""
+    if path in _imports:
+        return _imports[path]
+    tree = _parse(path)
+    names = []
+    for node in ast.walk(tree) if tree is not None else []:
+        if isinstance(node, ast.Import):
+            names.extend((0, alias.name.split(".")) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            module = node.module.split(".") if node.module else []
+            names.append((node.level, module))
+            names.extend((node.level, module + [a.name]) for a in node.names)
+
+    files = set()
+    for level, parts in names:
+        if level > 0:
+            base = os.path.dirname(path)
+            for _ in range(level - 1):
+                base = os.path.dirname(base)
+            files.update(_module_files(base, parts) if parts else [])
+            continue
+        for root in roots:
+            files.update(_module_files(root, parts))
+    files.discard(path)
+    _imports[path] = sorted(files)
+    return _imports[path]
+
+
+def dependencies(path: str, roots: list[str]) -> list[str]:
+    """Transitive closure of project files imported by the module at `path`, and by the
+    jet_fixtures.py its tests may get fixtures from."""
+    if path in _closures:
+        return _closures[path]
+    seen, stack = set(), [path]
+    shared = os.path.join(os.path.dirname(os.path.abspath(path)), FIXTURES_FILE)
+    if os.path.isfile(shared):
+        seen.add(shared)
+        stack.append(shared)
+    while stack:
+        for dependency in _local_imports(stack.pop(), roots):
+            if dependency not in seen:
+                seen.add(dependency)
+                stack.append(dependency)
+    seen.discard(path)
+    _closures[path] = sorted(seen)
+    return _closures[path]
+
+
+def project_files(roots: list[str]) -> dict[str, int]:
+    """Modification time of every python file under the project roots."""
+    files = {}
+    for root in roots:
+        for dirpath, subdirs, filenames in os.walk(root):
+            subdirs[:] = [
+                d for d in subdirs if not d.startswith(".") and d not in _SKIP_DIRS
+            ]
+            for x in filenames:
+                if x.endswith(".py"):
+                    path = os.path.abspath(os.path.join(dirpath, x))
+                    files[path] = os.stat(path).st_mtime_ns
+    return files
+
+
+def forget(files: set[str]) -> None:
+    """Drops everything computed from `files` so changed files are read again."""
+    for path in files:
+        _hashes.pop(path, None)
+        _imports.pop(path, None)
+    _closures.clear()
+
+
+def function_sources(path: str) -> dict[str, str]:
+    """Source, decorators included, of every top level function in the module."""
+    with open(path, "r") as file:
+        source = file.read()
+    lines = source.splitlines(keepends=True)
+    tree = _parse(path)
+    sources = {}
+    for node in tree.body if tree is not None else []:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            start = min([d.lineno for d in node.decorator_list] + [node.lineno])
+            sources[node.name] = "".join(lines[start - 1 : node.end_lineno])
+    return sources
+
+
+def fingerprint(path: str, source: str, roots: list[str]) -> str:
+    """Hash of a test's source, its module file and every file in its dependencies."""
+    digest = hashlib.sha1(source.encode())
+    digest.update(_hash_file(path).encode())
+    for dependency in dependencies(path, roots):
+        digest.update(dependency.encode())
+        digest.update(_hash_file(dependency).encode())
+    return digest.hexdigest()
+
+
+def key(path: str, name: str) -> str:
+    return f"{os.path.abspath(path)}::{name}"
+
+
+def load_cache(path: str) -> dict:
+    try:
+        with open(os.path.join(path, CACHE_FILE), "r") as fp:
+            return json.load(fp)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_cache(cache: dict, path: str) -> None:
+    filename = os.path.join(path, CACHE_FILE)
+    with open(filename + ".tmp", "w") as fp:
+        json.dump(cache, fp)
+    os.replace(filename + ".tmp", filename)
@@ -0,0 +1,127 @@
+"""Output capture.
+By default a test's output is captured by swapping sys.stdout. The fd mode instead points
+file descriptors 1 and 2 at a spool file on disk, which also catches stderr, C extensions
+and subprocesses, and keeps a chatty test from filling the runner's memory.
+Tests running side by side in one process write through a stand-in for sys.stdout that
+routes every write to the capture of the task or thread it comes from.
+Only a bounded head and tail of the output is kept in the results.
+"""
+# standard imports
+import contextvars
+import io
+import os
+import re
+import sys
+
+# bytes of output kept from the start and from the end of a test's output
+HEAD = 20000
+TAIL = 20000
+
+LOG_DIR = "jet.logs"
+
+
+def read_fd(fd: int) -> tuple[str, bool]:
+    """Head and tail of a spool file, without reading the middle.
+    Returns the text and whether anything was left out."""
+    size = os.fstat(fd).st_size
+    if size <= HEAD + TAIL:
+        return os.pread(fd, size, 0).decode(errors="replace"), False
+    head = os.pread(fd, HEAD, 0).decode(errors="replace")
+    tail = os.pread(fd, TAIL, size - TAIL).decode(errors="replace")
+    skipped = size - HEAD - TAIL
+    return f"{head}\n... {skipped} bytes skipped ...\n{tail}", True
+
+
+def read_output(output) -> tuple[str, bool]:
+    """Bounded text of an in memory or on disk capture."""
+    if isinstance(output, io.StringIO):
+        text = output.getvalue()
+        if len(text) <= HEAD + TAIL:
+            return text, False
+        skipped = len(text) - HEAD - TAIL
+        return f"{text[:HEAD]}\n... {skipped} chars skipped ...\n{text[-TAIL:]}", True
+    output.flush()
+    return read_fd(output.fileno())
+
+
+def keep_log(output, logs: str, name: str) -> str:
+    """Copies the full spool of a test into the logs directory, returns its path."""
+    os.makedirs(logs, exist_ok=True)
+    path = os.path.join(logs, re.sub(r"[^\w.-]+", "_", name) + ".log")
+    if isinstance(output, io.StringIO):
+        with open(path, "w") as f:
+            f.write(output.getvalue())
+        return path
+    output.flush()
+    fd, offset = output.fileno(), 0
+    with open(path, "wb") as f:
+        while chunk := os.pread(fd, 1 << 20, offset):
+            f.write(chunk)
+            offset += len(chunk)
+    return path
+
+
+class FdCapture:
+    """Sends file descriptors 1 and 2, and sys.stdout and sys.stderr, to a spool file."""
+
+    def __init__(self, spool):
+        self.spool = spool
+
+    def __enter__(self):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        self.streams = sys.stdout, sys.stderr
+        self.saved = [os.dup(1), os.dup(2)]
+        os.dup2(self.spool.fileno(), 1)
+        os.dup2(self.spool.fileno(), 2)
+        sys.stdout = sys.stderr = self.spool
+        return self
+
+    def __exit__(self, *exc_info):
+        self.spool.flush()
+        sys.stdout, sys.stderr = self.streams
+        for fd, saved in zip((1, 2), self.saved):
+            os.dup2(saved, fd)
+            os.close(saved)
+
+
+def terminal():
+    """A file on the original stdout that keeps working while fd 1 is captured."""
+    return os.fdopen(os.dup(sys.stdout.fileno()), "w")
+
+
+# capture of the task or thread running the current test, None outside of tests
+context_output = contextvars.ContextVar("jet_output", default=None)
+
+
+class ContextStdout:
+    """Stand-in for sys.stdout that writes to the capture of the running task or thread,
+    and to the stream it replaced everywhere else."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def _target(self):
+        output = context_output.get()
+        return self.stream if output is None else output
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def __getattr__(self, name: str):
+        return getattr(self._target(), name)
+
+
+class ContextCapture:
+    """Installs ContextStdout, so tests sharing the process each get their own output."""
+
+    def __enter__(self):
+        self.stream = sys.stdout
+        sys.stdout = ContextStdout(self.stream)
+        return self
+
+    def __exit__(self, *exc_info):
+        sys.stdout = self.stream
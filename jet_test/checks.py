@@ -1,9 +1,17 @@
 # standard imports
+import dataclasses
 import inspect
+import signal
+import sys
+import threading
 
 # self imports
+from jet_test.memory import format_bytes
+from jet_test.marks import SCOPES
 from jet_test.classes import Error, Test
 
+BUDGETS = ("wall", "cpu", "memory")
+
 
 def _wrap_error(test: Test, description: str) -> Error:
 
@@ -19,16 +27,167 @@ def _wrap_error(test: Test, description: str) -> Error:
     return error
 
 
-def arguments(test: Test) -> Error | None:
-    arguments = inspect.getfullargspec(test.routine)
-    if len(arguments.args) == 0:
-        return None
-    error = _wrap_error(
-        test,
-        "Could not run test. Please supply all arguments as default arguments or none at all",
+def _patched(function) -> int:
+    """Number of leading arguments that mock.patch decorators fill in with mocks."""
+    # mock is not imported here, a test that patches has already imported it
+    defaults = [
+        getattr(sys.modules.get(name), "DEFAULT", None)
+        for name in ("unittest.mock", "mock")
+    ]
+    return sum(
+        1
+        for patching in getattr(function, "patchings", ())
+        if not patching.attribute_name
+        and any(patching.new is default for default in defaults if default is not None)
     )
-    if arguments.defaults is None:
-        return error
-    if len(arguments.args) != len(arguments.defaults):
-        return error
+
+
+def required(function) -> list[str]:
+    """Parameters without a default, the fixtures a test or fixture asks for.
+    The signature is read through decorators, less the arguments mock.patch fills in."""
+    signature = inspect.signature(function)
+    parameters = list(signature.parameters.items())[_patched(function) :]
+    return [
+        name
+        for name, parameter in parameters
+        if parameter.default is inspect.Parameter.empty
+        and parameter.kind
+        in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
+    ]
+
+
+def _fixture_problem(names: list[str], scope: str, fixtures: dict, stack: tuple):
+    """Why the fixtures in `names`, asked for at `scope`, cannot be built."""
+    for name in names:
+        if name in stack:
+            return f"Fixtures ask for each other: {' -> '.join(stack + (name,))}"
+        if name not in fixtures:
+            if not stack:
+                return (
+                    f"Could not run test. No fixture named '{name}'. Define it with "
+                    "@fixture in the module or in jet_fixtures.py, or give the argument "
+                    "a default"
+                )
+            return f"No fixture named '{name}', asked for by the fixture '{stack[-1]}'"
+        needed = fixtures[name].__jet_fixture__
+        if SCOPES.index(needed) < SCOPES.index(scope):
+            return (
+                f"The {scope} fixture '{stack[-1]}' cannot use the {needed} fixture "
+                f"'{name}', which does not live as long"
+            )
+        problem = _fixture_problem(
+            required(fixtures[name]), needed, fixtures, stack + (name,)
+        )
+        if problem is not None:
+            return problem
     return None
+
+
+def arguments(test: Test, fixtures: dict) -> Error | None:
+    """Pre check that every argument without a default names a fixture, and that the
+    fixtures it needs can be built."""
+    problem = _fixture_problem(required(test.routine), "test", fixtures, ())
+    if problem is None:
+        return None
+    return _wrap_error(test, problem)
+
+
+def limits(test: Test, budget: dict) -> Error | None:
+    """Pre check of the budget declared for a test."""
+    for measure, limit in budget.items():
+        if measure not in BUDGETS:
+            return _wrap_error(
+                test, f"Unknown budget '{measure}'. Budgets are {', '.join(BUDGETS)}"
+            )
+        if isinstance(limit, bool) or not isinstance(limit, (int, float)) or limit <= 0:
+            return _wrap_error(
+                test, f"The {measure} budget must be a positive number, got {limit!r}"
+            )
+    return None
+
+
+def format_amount(measure: str, value: float) -> str:
+    """A budget measure as reports show it: bytes for memory, seconds otherwise."""
+    return format_bytes(value) if measure == "memory" else f"{value:.3f}s"
+
+
+def budget(
+    test: Test, result: Error, budget: dict, interrupted: str | None = None
+) -> Error | None:
+    """Post check: a Budget error when a passing test, or one stopped by a budget timer,
+    used more than its budget allows."""
+    if result.type not in ("Pass", "Budget") or not budget:
+        return None
+    used = {"wall": result.wall, "cpu": result.cpu, "memory": result.memory}
+    over = {}
+    for measure, limit in budget.items():
+        if used[measure] > limit or measure == interrupted:
+            # a timer firing a hair early still means the limit was reached
+            over[measure] = [max(used[measure], limit), limit]
+    if not over:
+        return None
+    breaches = []
+    for measure, (used, allowed) in over.items():
+        used, allowed = format_amount(measure, used), format_amount(measure, allowed)
+        if measure == interrupted:
+            breaches.append(f"stopped at its {allowed} {measure} budget")
+        else:
+            breaches.append(f"{measure} {used} over the {allowed} budget")
+    description = ", ".join(breaches)
+    return dataclasses.replace(
+        result,
+        type="Budget",
+        name="OverBudget",
+        description=description[0].upper() + description[1:],
+        line=result.line or inspect.getsourcelines(test.routine)[1],
+        budget=over,
+    )
+
+
+class BudgetExceeded(BaseException):
+    """Raised inside a test by a budget timer. Not an Exception, so that a test catching
+    every Exception cannot swallow it."""
+
+    def __init__(self, measure: str):
+        super().__init__(f"{measure} budget reached")
+        self.measure = measure
+
+
+class BudgetTimers:
+    """Interval timers that stop a test when it reaches its wall or cpu budget.
+    Signals only reach the main thread, elsewhere the post check alone applies."""
+
+    _TIMERS = {"wall": "ITIMER_REAL", "cpu": "ITIMER_PROF"}
+    _SIGNALS = {"wall": "SIGALRM", "cpu": "SIGPROF"}
+
+    def __init__(self, budget: dict):
+        self.budget = {m: budget[m] for m in self._TIMERS if m in budget}
+        self.active = (
+            bool(self.budget)
+            and hasattr(signal, "setitimer")
+            and threading.current_thread() is threading.main_thread()
+        )
+
+    def _stop(self, measure: str):
+        def handler(signum, frame):
+            raise BudgetExceeded(measure)
+
+        return handler
+
+    def __enter__(self):
+        if not self.active:
+            return self
+        self.handlers = {}
+        for measure, limit in self.budget.items():
+            signum = getattr(signal, self._SIGNALS[measure])
+            self.handlers[signum] = signal.signal(signum, self._stop(measure))
+            signal.setitimer(getattr(signal, self._TIMERS[measure]), limit)
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self.active:
+            return
+        for measure in self.budget:
+            signal.setitimer(getattr(signal, self._TIMERS[measure]), 0)
+        for signum, handler in self.handlers.items():
+            signal.signal(signum, handler)
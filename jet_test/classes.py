@@ -26,6 +26,58 @@ class RunConfig(JetConfig):
     n_jobs: int
     quiet: bool
     show_percentage: bool
+    static: bool
+    cache: bool
+    last_failed: bool
+    failed_first: bool
+    server: bool
+    watch: bool
+    slowest: int
+    stream: bool
+    timeout: float | None
+    capture: str
+    keep_logs: bool
+    headless: bool
+    junit: str | None
+    tap: str | None
+    async_limit: int
+    threads: int
+    shard: tuple[int, int] | None  # (index, count)
+    history: bool
+    memory: bool
+
+
+@dataclass(frozen=True)
+class ServeConfig(JetConfig):
+    path: str
+    n_jobs: int
+
+
+@dataclass(frozen=True)
+class MergeConfig(JetConfig):
+    path: str
+    files: list[str]
+
+
+@dataclass(frozen=True)
+class HistoryConfig(JetConfig):
+    path: str
+    query: str  # flaky/trends/growing
+    runs: int
+    limit: int
+
+
+@dataclass(frozen=True)
+class BenchConfig(JetConfig):
+    path: str
+    files: list
+    rounds: int
+    warmup: int
+    min_time: float
+    gc: bool
+    pin: int | None
+    threshold: float
+    save_baseline: bool
 
 
 @dataclass(frozen=True)
@@ -36,6 +88,9 @@ class SeeConfig(JetConfig):
     buffer: int
     path: str
     console: Console
+    durations: bool
+    log: bool
+    bench: bool
 
 
 @dataclass(frozen=True)
@@ -52,14 +107,36 @@ class Test:
     doc: str
     module: Module
     routine: Any | None = None
+    kind: str = "sync"  # sync/async
+    threads: bool | None = None  # opted in or out of the thread pool
+    has_timeout: bool = False  # limited with marks.timeout or its module's JET_TIMEOUT
 
 
 @dataclass(frozen=True)
 class Error:
-    type: str  # pass/fail/error/warning
+    type: str  # pass/fail/error/warning/timeout/budget
     name: str  # alias
     description: str
     line: int
     variables: dict
     out: str
     test: Test
+    wall: float = 0.0  # seconds
+    cpu: float = 0.0
+    log: str | None = None  # full output, kept when `out` had to be cut
+    memory: int = 0  # peak bytes allocated by python, with --memory
+    rss: int = 0  # growth of resident memory, bytes
+    allocations: list | None = None  # [file:line, bytes, blocks], when not passing
+    budget: dict | None = None  # {measure: [used, allowed]} of a Budget result
+    setup: float = 0.0  # seconds building fixtures, not counted in wall and cpu
+
+
+@dataclass(frozen=True)
+class ResultEntry:
+    offset: int  # bytes into the results file
+    length: int
+    name: str
+    module: str
+    path: str
+    type: str
+    description: str
@@ -0,0 +1,183 @@
+"""Static test discovery.
+Reads module docstrings and test functions from source with `ast` instead of importing modules.
+Parsed modules are kept in an on-disk index keyed by file mtime and content hash.
+"""
+# standard imports
+import ast
+import hashlib
+import json
+import os
+import sys
+
+
+class ErrorDuringParse(Exception):
+    """Errors that occurred while trying to parse a test module."""
+
+    def __init__(self, filename, exc_info):
+        self.filename = filename
+        self.exc, self.value, self.tb = exc_info
+
+    def __str__(self):
+        exc = self.exc.__name__
+        return "problem in %s - %s: %s" % (self.filename, exc, self.value)
+
+
+INDEX_FILE = "jet.collection.json"
+# bumped when the entries change shape, older indexes are dropped
+INDEX_VERSION = 4
+
+_index = {}
+_checked = set()
+_dirty = False
+
+
+def _is_test(node: ast.AST) -> bool:
+    if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        return False
+    return node.name.startswith("test")
+
+
+def _kind(node: ast.AST) -> str:
+    return "async" if isinstance(node, ast.AsyncFunctionDef) else "sync"
+
+
+def _constant(node: ast.AST):
+    return node.value if isinstance(node, ast.Constant) else None
+
+
+def _module_threads(tree: ast.Module) -> bool | None:
+    """Value of a module level JET_THREADS = True/False, if any."""
+    threads = None
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == "JET_THREADS"
+            for target in node.targets
+        ):
+            threads = _constant(node.value)
+    return threads
+
+
+def _module_timeout(tree: ast.Module) -> bool:
+    """Whether the module sets JET_TIMEOUT to anything but None."""
+    timeout = False
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == "JET_TIMEOUT"
+            for target in node.targets
+        ):
+            timeout = not (
+                isinstance(node.value, ast.Constant) and node.value.value is None
+            )
+    return timeout
+
+
+def _timeout(node: ast.AST, default: bool) -> bool:
+    """Whether @timeout is among the decorators of a test."""
+    for decorator in node.decorator_list:
+        function = decorator.func if isinstance(decorator, ast.Call) else decorator
+        name = getattr(function, "id", None) or getattr(function, "attr", None)
+        if name == "timeout":
+            return True
+    return default
+
+
+def _threads(node: ast.AST, default: bool | None) -> bool | None:
+    """Reads @threaded and @threaded(False) among the decorators of a test."""
+    for decorator in node.decorator_list:
+        call = decorator if isinstance(decorator, ast.Call) else None
+        function = call.func if call is not None else decorator
+        name = getattr(function, "id", None) or getattr(function, "attr", None)
+        if name != "threaded":
+            continue
+        if call is None or not call.args:
+            return True
+        return _constant(call.args[0])
+    return default
+
+
+def parse_source(source: str | bytes, path: str) -> tuple[str | None, list]:
+    """Returns the module docstring and the (name, docstring, kind, threads, timeout) of
+    every test function, threads being whether it opted in or out of the thread pool and
+    timeout whether it has a time limit of its own."""
+    tree = ast.parse(source, filename=path)
+    default = _module_threads(tree)
+    timeout = _module_timeout(tree)
+    routines = [
+        (
+            node.name,
+            ast.get_docstring(node, clean=False),
+            _kind(node),
+            _threads(node, default),
+            _timeout(node, timeout),
+        )
+        for node in tree.body
+        if _is_test(node)
+    ]
+    # same order as inspect.getmembers
+    routines.sort(key=lambda routine: routine[0])
+    return ast.get_docstring(tree, clean=False), routines
+
+
+def _refresh(path: str) -> None:
+    global _dirty
+    stat = os.stat(path)
+    entry = _index.get(path)
+    if entry and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+        return
+    with open(path, "rb") as file:
+        source = file.read()
+    digest = hashlib.sha1(source).hexdigest()
+    _dirty = True
+    if entry and entry["hash"] == digest:
+        entry["mtime"], entry["size"] = stat.st_mtime_ns, stat.st_size
+        return
+    try:
+        doc, routines = parse_source(source, path)
+    except (SyntaxError, ValueError):
+        raise ErrorDuringParse(path, sys.exc_info())
+    _index[path] = {
+        "mtime": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "hash": digest,
+        "doc": doc,
+        "tests": routines,
+    }
+
+
+def parse_file(path: str) -> tuple[str | None, list]:
+    """Parses a test module, serving it from the index when the file is unchanged."""
+    path = os.path.abspath(path)
+    if path not in _checked:
+        _refresh(path)
+        _checked.add(path)
+    entry = _index[path]
+    return entry["doc"], [tuple(routine) for routine in entry["tests"]]
+
+
+def forget(files: set[str]) -> None:
+    """Makes the next parse of `files` check them on disk again."""
+    _checked.difference_update(files)
+
+
+def load_index(path: str) -> None:
+    """Loads the collection index stored in the tests directory, if any."""
+    global _index
+    try:
+        with open(os.path.join(path, INDEX_FILE), "r") as fp:
+            stored = json.load(fp)
+        _index = stored["modules"] if stored.get("version") == INDEX_VERSION else {}
+    except (FileNotFoundError, ValueError, KeyError, AttributeError):
+        _index = {}
+
+
+def save_index(path: str) -> None:
+    """Writes the collection index back if anything changed, dropping deleted files."""
+    global _dirty
+    if not _dirty:
+        return
+    index = {k: v for k, v in _index.items() if k in _checked or os.path.exists(k)}
+    filename = os.path.join(path, INDEX_FILE)
+    with open(filename + ".tmp", "w") as fp:
+        json.dump({"version": INDEX_VERSION, "modules": index}, fp)
+    os.replace(filename + ".tmp", filename)
+    _dirty = False
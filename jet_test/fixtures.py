@@ -0,0 +1,216 @@
+"""Fixtures.
+A test asks for a fixture by naming it as a parameter. Fixtures are functions marked
+with @fixture in the test module, or in jet_fixtures.py beside it; a generator fixture
+yields its value and tears it down after the yield. Fixtures can ask for other fixtures
+the same way.
+A value is built once per scope and shared within it:
+- test: every test gets its own, torn down right after it.
+- module: shared by the tests of a module, torn down at the end of the run.
+- session: shared by the tests of a run, torn down at its end. Worker processes cannot
+  share values, each builds its own and keeps it until it exits.
+- worker: kept by the process for as long as it lives, across the runs of --watch and of
+  the workers of jet serve.
+Shared values are torn down in the reverse order they were built, and by the workers of
+jet serve when the code changes. What they print is captured, and a teardown that raises
+is reported as an error of its own instead of stopping the run.
+"""
+# standard imports
+import atexit
+import dataclasses
+import inspect
+import io
+import os
+import threading
+import time
+from contextlib import redirect_stdout
+from typing import Callable, Iterator
+
+# self imports
+import jet_test.runner as runner
+import jet_test.capture as capture
+import jet_test.snapshot as snapshot
+from jet_test.marks import SCOPES
+from jet_test.cache import FIXTURES_FILE
+from jet_test.checks import required
+from jet_test.classes import Test, Error, Module
+
+# scopes that end with a run in the process that ran it
+RUN_SCOPES = ("module", "session")
+
+# threads of the same run may ask for the same shared fixture
+_lock = threading.RLock()
+# (scope, module path or None, name) -> value of a shared fixture
+_shared = {}
+# (key, generator) of every shared generator fixture, in the order they were built
+_finalizers = []
+
+
+def _marked(module) -> dict[str, Callable]:
+    return {
+        name: value
+        for name, value in vars(module).items()
+        if callable(value) and hasattr(value, "__jet_fixture__")
+    }
+
+
+def definitions(path: str) -> dict[str, Callable]:
+    """Fixtures of the tests of a module: its own, over those of jet_fixtures.py."""
+    found = {}
+    shared = os.path.join(os.path.dirname(os.path.abspath(path)), FIXTURES_FILE)
+    if os.path.exists(shared):
+        found.update(_marked(runner._load_module(shared)))
+    found.update(_marked(runner._load_module(path)))
+    return found
+
+
+def _build(function: Callable, arguments: dict) -> tuple:
+    """Value of a fixture, and its generator when it has a teardown."""
+    result = function(**arguments)
+    if inspect.isgenerator(result):
+        return next(result), result
+    return result, None
+
+
+class _Resolver:
+    """Builds the fixtures of one test, sharing those of broader scopes.
+    checks.arguments made sure beforehand that they can be built."""
+
+    def __init__(self, test: Test, teardowns: list):
+        self.path = test.module.path
+        self.definitions = definitions(self.path)
+        self.local = {}
+        self.teardowns = teardowns
+
+    def arguments(self, function: Callable) -> dict:
+        return {name: self.value(name) for name in required(function)}
+
+    def value(self, name: str):
+        function = self.definitions[name]
+        scope = function.__jet_fixture__
+        if scope == "test":
+            if name not in self.local:
+                arguments = self.arguments(function)
+                self.local[name], teardown = _build(function, arguments)
+                if teardown is not None:
+                    self.teardowns.append(teardown)
+            return self.local[name]
+
+        key = (scope, self.path if scope == "module" else None, name)
+        with _lock:
+            if key not in _shared:
+                arguments = self.arguments(function)
+                value, teardown = _build(function, arguments)
+                _shared[key] = value
+                if teardown is not None:
+                    _finalizers.append((key, teardown))
+            return _shared[key]
+
+
+def _finish(teardowns: list[Iterator]) -> None:
+    """Runs the code after the yield of every generator, latest first, then raises the
+    first error any of them raised."""
+    error = None
+    for teardown in reversed(teardowns):
+        try:
+            next(teardown, None)
+        except Exception as exception:
+            error = error or exception
+    if error is not None:
+        raise error
+
+
+def _teardown_error(
+    key: tuple, teardown: Iterator, exception: Exception, out: str
+) -> tuple[Test, Error]:
+    """A failed teardown as an error of its own, under the file of the fixture."""
+    scope, _, name = key
+    path = teardown.gi_code.co_filename
+    test = Test(
+        name=f"Teardown of {name}",
+        doc=f"The {scope} fixture '{name}' should tear down cleanly",
+        module=Module(name=runner._clean_name(path), doc="", path=path),
+    )
+    frame, line = snapshot.innermost(exception.__traceback__, path)
+    error = Error(
+        type="Error",
+        name=type(exception).__name__,
+        description=str(exception),
+        line=line,
+        variables=snapshot.capture(frame.f_locals),
+        out=out,
+        test=test,
+    )
+    return test, error
+
+
+def close(scopes: tuple = SCOPES) -> list[tuple[Test, Error]]:
+    """Tears down the shared fixtures of `scopes`, latest first, capturing what they
+    print. Returns a (test, error) pair for every teardown that raised."""
+    with _lock:
+        ending = [(key, g) for key, g in _finalizers if key[0] in scopes]
+        _finalizers[:] = [(key, g) for key, g in _finalizers if key[0] not in scopes]
+        for key in [key for key in _shared if key[0] in scopes]:
+            del _shared[key]
+    failures = []
+    for key, teardown in reversed(ending):
+        output = io.StringIO()
+        try:
+            with redirect_stdout(output):
+                next(teardown, None)
+        except Exception as exception:
+            out, _ = capture.read_output(output)
+            failures.append(_teardown_error(key, teardown, exception, out))
+    return failures
+
+
+def closing(scopes: tuple) -> Iterator[tuple[Test, Error]]:
+    """Tears down the fixtures of `scopes` once reached, yielding the failures."""
+    yield from close(scopes)
+
+
+# values kept by the process are torn down when it exits
+atexit.register(close)
+
+
+class Fixtures:
+    """Builds the fixtures a test asks for on enter, tears down its test scoped ones on
+    exit, and keeps the time setting them up took."""
+
+    setup = 0.0
+
+    def __init__(self, test: Test):
+        self.test = test
+        self.kwargs = {}
+        self.teardowns = []
+
+    def __enter__(self):
+        names = required(self.test.routine)
+        if not names:
+            return self
+        start = time.perf_counter()
+        try:
+            resolver = _Resolver(self.test, self.teardowns)
+            self.kwargs = {name: resolver.value(name) for name in names}
+        except BaseException:
+            # what was built before the failure still gets torn down
+            try:
+                _finish(self.teardowns)
+            except Exception:
+                pass
+            raise
+        finally:
+            self.setup = time.perf_counter() - start
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        try:
+            _finish(self.teardowns)
+        except Exception:
+            # a test that failed reports its own failure, not that of the teardown
+            if exc_type is None:
+                raise
+
+    def timed(self, error: Error) -> Error:
+        if not self.setup:
+            return error
+        return dataclasses.replace(error, setup=self.setup)
@@ -0,0 +1,202 @@
+"""Run history.
+An optional SQLite database in the tests directory that every run appends to: outcome,
+duration, error and line of each test, with the fingerprint of its code. `jet history`
+queries it for flaky tests and duration trends.
+Every query is served by an index, so they stay fast over months of runs.
+"""
+# standard imports
+import os
+import sqlite3
+import time
+
+# self imports
+import jet_test.cache as cache
+from jet_test.classes import HistoryConfig, JetError, Error
+
+# dependencies
+from rich.console import Console
+from rich.table import Table
+from rich.box import MINIMAL
+
+HISTORY_FILE = "jet.history.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run INTEGER NOT NULL REFERENCES runs(id),
+    path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    fingerprint TEXT,
+    type TEXT NOT NULL,
+    wall REAL NOT NULL,
+    cpu REAL NOT NULL,
+    error TEXT,
+    line INTEGER
+);
+-- flaky: outcomes of the same code, read from the index alone
+CREATE INDEX IF NOT EXISTS results_outcomes ON results(path, name, fingerprint, type);
+-- trends and growing: the latest runs, then the durations of one test
+CREATE INDEX IF NOT EXISTS results_runs ON results(run, path, name, wall);
+"""
+
+_FLAKY = """
+SELECT path, name, fingerprint,
+    SUM(type = 'Pass') AS passed, SUM(type != 'Pass') AS failed
+FROM results
+WHERE fingerprint IS NOT NULL
+GROUP BY path, name, fingerprint
+HAVING passed > 0 AND failed > 0
+ORDER BY MIN(passed, failed) DESC, failed DESC
+LIMIT ?
+"""
+
+# GROUP_CONCAT does not promise any order, the series are put together in python
+_TRENDS = """
+SELECT path, name, wall
+FROM results INDEXED BY results_runs
+WHERE run > ?
+ORDER BY run
+"""
+
+# least squares slope of wall time against run number, of tests getting slower
+_GROWING = """
+SELECT path, name, fastest, slowest, (n * sxy - sx * sy) / (n * sxx - sx * sx)
+FROM (
+    SELECT path, name, COUNT(*) AS n,
+        SUM(run) AS sx, SUM(wall) AS sy, SUM(run * wall) AS sxy, SUM(run * run) AS sxx,
+        MIN(wall) AS fastest, MAX(wall) AS slowest
+    -- left to itself, the planner scans every run to group without sorting
+    FROM results INDEXED BY results_runs
+    WHERE run > ?
+    GROUP BY path, name
+    HAVING COUNT(DISTINCT run) > 2
+)
+WHERE n * sxx - sx * sx > 0 AND n * sxy - sx * sy > 0
+ORDER BY (n * sxy - sx * sy) / (n * sxx - sx * sx) DESC
+LIMIT ?
+"""
+
+_SPARKS = "▁▂▃▄▅▆▇█"
+
+
+def connect(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(os.path.join(path, HISTORY_FILE))
+    # CI jobs may append while someone queries
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def record(
+    path: str, results: list[Error], summary: str, fingerprints: dict[str, str]
+) -> None:
+    """Appends a run, and the outcome of every test it ran, in one transaction."""
+    with connect(path) as connection:
+        run = connection.execute(
+            "INSERT INTO runs (started, summary) VALUES (?, ?)", (time.time(), summary)
+        ).lastrowid
+        connection.executemany(
+            "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    run,
+                    # relative, so moving the checkout keeps the history of each test
+                    os.path.relpath(r.test.module.path, path),
+                    r.test.name,
+                    fingerprints.get(cache.key(r.test.module.path, r.test.name)),
+                    r.type,
+                    r.wall,
+                    r.cpu,
+                    None if r.type == "Pass" else r.name,
+                    None if r.type == "Pass" else r.line,
+                )
+                for r in results
+            ),
+        )
+    connection.close()
+
+
+def _since(connection: sqlite3.Connection, runs: int) -> int:
+    """Id before the first of the latest `runs` runs."""
+    latest = connection.execute("SELECT MAX(id) FROM runs").fetchone()[0] or 0
+    return latest - runs
+
+
+def _sparkline(walls: list[float]) -> str:
+    low, high = min(walls), max(walls)
+    if high == low:
+        return _SPARKS[0] * len(walls)
+    steps = len(_SPARKS) - 1
+    return "".join(_SPARKS[round((w - low) / (high - low) * steps)] for w in walls)
+
+
+def flaky(connection: sqlite3.Connection, limit: int) -> Table:
+    table = Table(box=MINIMAL, header_style="dim")
+    table.add_column("Passed", justify="right")
+    table.add_column("Failed", justify="right")
+    table.add_column("Test")
+    table.add_column("Module", style="dim")
+    table.add_column("Code", style="dim")
+    for path, name, fingerprint, passed, failed in connection.execute(_FLAKY, (limit,)):
+        table.add_row(str(passed), str(failed), name, path, fingerprint[:8])
+    return table
+
+
+def trends(connection: sqlite3.Connection, runs: int, limit: int) -> Table:
+    table = Table(box=MINIMAL, header_style="dim")
+    table.add_column("Runs", justify="right", style="dim")
+    table.add_column("Min", justify="right")
+    table.add_column("Mean", justify="right")
+    table.add_column("Max", justify="right")
+    table.add_column("Trend")
+    table.add_column("Test")
+    table.add_column("Module", style="dim")
+    series = {}
+    for path, name, wall in connection.execute(_TRENDS, (_since(connection, runs),)):
+        series.setdefault((path, name), []).append(wall)
+    means = {test: sum(walls) / len(walls) for test, walls in series.items()}
+    for path, name in sorted(means, key=means.get, reverse=True)[:limit]:
+        walls = series[path, name]
+        table.add_row(
+            str(len(walls)),
+            f"{min(walls):.3f}s",
+            f"{means[path, name]:.3f}s",
+            f"{max(walls):.3f}s",
+            _sparkline(walls),
+            name,
+            path,
+        )
+    return table
+
+
+def growing(connection: sqlite3.Connection, runs: int, limit: int) -> Table:
+    table = Table(box=MINIMAL, header_style="dim")
+    table.add_column("Per run", justify="right")
+    table.add_column("Fastest", justify="right", style="dim")
+    table.add_column("Slowest", justify="right", style="dim")
+    table.add_column("Test")
+    table.add_column("Module", style="dim")
+    rows = connection.execute(_GROWING, (_since(connection, runs), limit))
+    for path, name, fastest, slowest, slope in rows:
+        table.add_row(
+            f"+{slope * 1000:.2f}ms", f"{fastest:.3f}s", f"{slowest:.3f}s", name, path
+        )
+    return table
+
+
+def History(config: HistoryConfig) -> None:
+    if not os.path.exists(os.path.join(config.path, HISTORY_FILE)):
+        raise JetError("No run history found. Run jet run --history to record runs")
+    connection = connect(config.path)
+    console = Console()
+    if config.query == "flaky":
+        console.print(flaky(connection, config.limit))
+    elif config.query == "trends":
+        console.print(trends(connection, config.runs, config.limit))
+    elif config.query == "growing":
+        console.print(growing(connection, config.runs, config.limit))
+    connection.close()
@@ -6,6 +6,8 @@ Testing library for python with emphasis on simplicity and presentation.
 # standard
 import argparse
 import os
+import shutil
+import sys
 import textwrap
 from dataclasses import asdict
 import importlib.metadata
@@ -13,7 +15,19 @@ import importlib.metadata
 # self
 from jet_test.runner import Run
 from jet_test.seer import See
-from jet_test.classes import JetConfig, RunConfig, SeeConfig
+from jet_test.server import Serve
+from jet_test.merge import Merge
+from jet_test.history import History
+from jet_test.bench import Bench
+from jet_test.classes import (
+    JetConfig,
+    RunConfig,
+    SeeConfig,
+    ServeConfig,
+    MergeConfig,
+    HistoryConfig,
+    BenchConfig,
+)
 
 # dependencies
 from rich.console import Console
@@ -21,6 +35,16 @@ from rich.console import Console
 __version__ = importlib.metadata.version("jet-test")
 
 
+def _shard(value: str) -> tuple[int, int]:
+    try:
+        index, count = (int(x) for x in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected K/N, e.g. 1/4, got {value}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {index} does not exist out of {count}")
+    return index, count
+
+
 def add_run_subparser(subparsers):
     run = subparsers.add_parser("run", help="Run tests")
     run.add_argument(
@@ -73,6 +97,159 @@ def add_run_subparser(subparsers):
         """,
         action="store_true",
     )
+    run.add_argument(
+        "-s",
+        "--static",
+        help="""Collect tests by parsing source instead of importing modules.
+        Modules are only imported once selected, inside the process that runs them.
+        """,
+        action="store_true",
+        default=False,
+    )
+    run.add_argument(
+        "-c",
+        "--cache",
+        help="""Skip tests that passed before and whose source, module and imported project modules did not change.
+        """,
+        action="store_true",
+        default=False,
+    )
+    run.add_argument(
+        "--last-failed",
+        help="""Only run the tests that did not pass in the last run. Skips module selection.
+        Runs everything when the last run had no failures.
+        """,
+        action="store_true",
+        default=False,
+    )
+    run.add_argument(
+        "--failed-first",
+        help="""Run the tests that did not pass in the last run before all others.
+        """,
+        action="store_true",
+        default=False,
+    )
+    run.add_argument(
+        "--server",
+        help="""Run tests on the warm workers of a running jet serve instead of locally.
+        """,
+        action="store_true",
+        default=False,
+    )
+    run.add_argument(
+        "-w",
+        "--watch",
+        help="""Keep running and re-run the tests affected by every file change.
+        """,
+        action="store_true",
+        default=False,
+    )
+    run.add_argument(
+        "--slowest",
+        help="""Number of slowest tests to list after the summary. Defaults to none.
+        """,
+        type=int,
+        default=0,
+        metavar="\b",
+    )
+    run.add_argument(
+        "--stream",
+        help="""Write results to jet.results.jsonl as each test finishes instead of at the end.
+        """,
+        action="store_true",
+        default=False,
+    )
+    run.add_argument(
+        "--timeout",
+        help="""Seconds a test may run before its worker is killed and it counts as timed out.
+        Tests can set their own with jet_test.timeout or a module level JET_TIMEOUT.
+        """,
+        type=float,
+        default=None,
+        metavar="\b",
+    )
+    run.add_argument(
+        "--capture",
+        help="""How to capture test output: sys swaps sys.stdout, fd also takes stderr and
+        output of C extensions and subprocesses, spooled to disk. Defaults to sys.
+        """,
+        choices=["sys", "fd"],
+        default="sys",
+        metavar="\b",
+    )
+    run.add_argument(
+        "--keep-logs",
+        help="""Keep the full output of tests whose output was cut in the results, in jet.logs.
+        """,
+        action="store_true",
+        default=False,
+    )
+    run.add_argument(
+        "--headless",
+        help="""Print plain lines and the summary without the progress bar.
+        The default when the output is not a terminal.
+        """,
+        action="store_true",
+        default=False,
+    )
+    run.add_argument(
+        "--async-limit",
+        help="""Number of async tests run at the same time on the event loop. Defaults to 100.
+        """,
+        type=int,
+        default=100,
+        metavar="\b",
+    )
+    run.add_argument(
+        "--threads",
+        help="""Run every test in a pool of this many threads, except tests or modules
+        opted out with @threaded(False) or JET_THREADS = False. Without it, only tests
+        opted in with @threaded or JET_THREADS = True use threads.
+        """,
+        type=int,
+        default=0,
+        metavar="\b",
+    )
+    run.add_argument(
+        "--shard",
+        help="""Run only shard K of N, written K/N, e.g. 2/12 on the second of 12 CI machines.
+        Every machine computes the same split, balanced by jet.durations.json when present.
+        """,
+        type=_shard,
+        default=None,
+        metavar="\b",
+    )
+    run.add_argument(
+        "--memory",
+        help="""Record the peak python allocations and resident memory growth of each
+        test, and where failing tests held memory. Tests of a process run one at a time.
+        """,
+        action="store_true",
+        default=False,
+    )
+    run.add_argument(
+        "--history",
+        help="""Append the outcome and duration of every test to jet.history.db, for jet history.
+        """,
+        action="store_true",
+        default=False,
+    )
+    run.add_argument(
+        "--junit",
+        help="""Also stream a JUnit XML report of every test to this file, for CI.
+        """,
+        type=str,
+        default=None,
+        metavar="\b",
+    )
+    run.add_argument(
+        "--tap",
+        help="""Also stream a TAP report of every test to this file, for CI.
+        """,
+        type=str,
+        default=None,
+        metavar="\b",
+    )
 
 
 def handle_run(args, session):
@@ -83,12 +260,221 @@ def handle_run(args, session):
         n_jobs=args.n_jobs,
         quiet=args.quiet,
         show_percentage=args.percentage,
+        static=args.static,
+        cache=args.cache,
+        last_failed=args.last_failed,
+        failed_first=args.failed_first,
+        server=args.server,
+        watch=args.watch,
+        slowest=args.slowest,
+        stream=args.stream,
+        timeout=args.timeout,
+        capture=args.capture,
+        keep_logs=args.keep_logs,
+        headless=args.headless or not sys.stdout.isatty(),
+        junit=args.junit,
+        tap=args.tap,
+        async_limit=args.async_limit,
+        threads=args.threads,
+        shard=args.shard,
+        history=args.history,
+        memory=args.memory,
         **asdict(session),
     )
     # print(config)
     Run(config=config)
 
 
+def add_serve_subparser(subparsers):
+    serve = subparsers.add_parser("serve", help="Keep warm test workers running")
+    serve.add_argument(
+        "-d",
+        "--dir",
+        help="""Path to tests directory. Defaults to /tests when not supplied.
+        """,
+        metavar="\b",
+        default=os.getcwd() + "/tests",
+    )
+    serve.add_argument(
+        "-j",
+        "--n-jobs",
+        help="""Number of worker processes to keep alive. Defaults to the number of cpus.
+        """,
+        type=int,
+        default=os.cpu_count(),
+        metavar="\b",
+    )
+
+
+def handle_serve(args, session):
+    config = ServeConfig(path=args.dir, n_jobs=args.n_jobs, **asdict(session))
+    Serve(config=config)
+
+
+def add_merge_subparser(subparsers):
+    merge = subparsers.add_parser("merge", help="Merge the results of sharded runs")
+    merge.add_argument(
+        "files",
+        help="""Results files to merge, e.g. the jet.results.json of every shard.
+        """,
+        nargs="+",
+        metavar="FILES",
+    )
+    merge.add_argument(
+        "-d",
+        "--dir",
+        help="""Directory to write the merged jet.results.json to. Defaults to /tests.
+        """,
+        metavar="\b",
+        default=os.getcwd() + "/tests",
+    )
+
+
+def handle_merge(args, session):
+    config = MergeConfig(path=args.dir, files=args.files, **asdict(session))
+    Merge(config=config)
+
+
+def add_history_subparser(subparsers):
+    history = subparsers.add_parser("history", help="Query the history of past runs")
+    history.add_argument(
+        "query",
+        help="""flaky: tests that passed and failed with the same code.
+        trends: durations of every test over the latest runs.
+        growing: tests whose duration grows the most from run to run.
+        """,
+        choices=["flaky", "trends", "growing"],
+    )
+    history.add_argument(
+        "-d",
+        "--dir",
+        help="""Path to tests directory. Defaults to /tests when not supplied.
+        """,
+        metavar="\b",
+        default=os.getcwd() + "/tests",
+    )
+    history.add_argument(
+        "--runs",
+        help="""Number of latest runs looked at by trends and growing. Defaults to 50.
+        """,
+        type=int,
+        default=50,
+        metavar="\b",
+    )
+    history.add_argument(
+        "--limit",
+        help="""Number of tests listed. Defaults to 20.
+        """,
+        type=int,
+        default=20,
+        metavar="\b",
+    )
+
+
+def handle_history(args, session):
+    config = HistoryConfig(
+        path=args.dir,
+        query=args.query,
+        runs=args.runs,
+        limit=args.limit,
+        **asdict(session),
+    )
+    History(config=config)
+
+
+def add_bench_subparser(subparsers):
+    bench = subparsers.add_parser("bench", help="Run benchmarks")
+    bench.add_argument(
+        "-d",
+        "--dir",
+        help="""Path to tests directory. Defaults to /tests when not supplied.
+        """,
+        metavar="\b",
+        default=os.getcwd() + "/tests",
+    )
+    bench.add_argument(
+        "-f",
+        "--files",
+        nargs="+",
+        help="""List of modules to consider only instead of entire directory.
+        """,
+        metavar="\b",
+    )
+    bench.add_argument(
+        "--rounds",
+        help="""Number of timed rounds of each benchmark. Defaults to 20.
+        """,
+        type=int,
+        default=20,
+        metavar="\b",
+    )
+    bench.add_argument(
+        "--warmup",
+        help="""Number of rounds run and thrown away before timing. Defaults to 3.
+        """,
+        type=int,
+        default=3,
+        metavar="\b",
+    )
+    bench.add_argument(
+        "--min-time",
+        help="""Seconds a round should last at least, calls are repeated until it does.
+        Defaults to 0.01.
+        """,
+        type=float,
+        default=0.01,
+        metavar="\b",
+    )
+    bench.add_argument(
+        "--gc",
+        help="""Keep the garbage collector running while timing.
+        """,
+        action="store_true",
+        default=False,
+    )
+    bench.add_argument(
+        "--pin",
+        help="""Pin the process to this cpu while benchmarking (Linux).
+        """,
+        type=int,
+        default=None,
+        metavar="\b",
+    )
+    bench.add_argument(
+        "--threshold",
+        help="""Relative slowdown of the median against the baseline that counts as a
+        regression. Defaults to 0.1, i.e. 10%%.
+        """,
+        type=float,
+        default=0.1,
+        metavar="\b",
+    )
+    bench.add_argument(
+        "--save-baseline",
+        help="""Store the results as the new baseline, jet.bench.baseline.json.
+        """,
+        action="store_true",
+        default=False,
+    )
+
+
+def handle_bench(args, session):
+    config = BenchConfig(
+        path=args.dir,
+        files=args.files,
+        rounds=max(1, args.rounds),
+        warmup=args.warmup,
+        min_time=args.min_time,
+        gc=args.gc,
+        pin=args.pin,
+        threshold=args.threshold,
+        save_baseline=args.save_baseline,
+        **asdict(session),
+    )
+    if not Bench(config=config):
+        sys.exit(1)
+
+
 def add_see_subparser(subparsers):
     see = subparsers.add_parser("see", help="See test results")
     see.add_argument(
@@ -125,18 +511,42 @@ def add_see_subparser(subparsers):
         default=60,
         metavar="\b",
     )
+    see.add_argument(
+        "--durations",
+        help="""List every test of the last run sorted by duration instead of choosing a report.
+        """,
+        action="store_true",
+        default=False,
+    )
+    see.add_argument(
+        "--log",
+        help="""Page through the full output of the chosen test, kept by jet run --keep-logs.
+        """,
+        action="store_true",
+        default=False,
+    )
+    see.add_argument(
+        "--bench",
+        help="""Show the results of the last jet bench instead of choosing a report.
+        """,
+        action="store_true",
+        default=False,
+    )
 
 
 def handle_see(args, session):
-    _pad = int(max([0, os.get_terminal_size().columns - args.doc_width]) / 2)
+    _pad = int(max([0, shutil.get_terminal_size().columns - args.doc_width]) / 2)
 
     config = SeeConfig(
         pad=_pad,
         path=args.dir,
-        doc_width=os.get_terminal_size().columns - (12 + 2 * _pad),
+        doc_width=shutil.get_terminal_size().columns - (12 + 2 * _pad),
         text_width=args.text_width,
         buffer=args.buffer,
         console=Console(),
+        durations=args.durations,
+        log=args.log,
+        bench=args.bench,
         **asdict(session),
     )
     See(config=config)
@@ -201,6 +611,10 @@ def main_parser():
     subparsers = parser.add_subparsers(dest="command")
     add_run_subparser(subparsers)
     add_see_subparser(subparsers)
+    add_serve_subparser(subparsers)
+    add_merge_subparser(subparsers)
+    add_history_subparser(subparsers)
+    add_bench_subparser(subparsers)
     return parser
 
 
@@ -222,6 +636,14 @@ def main():
         handle_run(args, session)
     elif args.command == "see":
         handle_see(args, session)
+    elif args.command == "serve":
+        handle_serve(args, session)
+    elif args.command == "merge":
+        handle_merge(args, session)
+    elif args.command == "history":
+        handle_history(args, session)
+    elif args.command == "bench":
+        handle_bench(args, session)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,85 @@
+"""Test marks.
+Decorators that attach jet options to a single test function.
+A module can set the same options for all its tests with module level constants,
+e.g. JET_TIMEOUT = 10, JET_THREADS = True or JET_BUDGET = {"wall": 1}.
+"""
+# standard imports
+from typing import Callable
+
+SCOPES = ("test", "module", "session", "worker")
+
+
+def timeout(seconds: float) -> Callable:
+    """Kills the test if it runs for longer than `seconds`, overriding --timeout.
+
+    @timeout(2)
+    def test_connects():
+        ...
+    """
+
+    def mark(test_function: Callable) -> Callable:
+        test_function.__jet_timeout__ = seconds
+        return test_function
+
+    return mark
+
+
+def threaded(test_function: Callable | bool = True) -> Callable:
+    """Runs the test in the thread pool of the run, or never with @threaded(False).
+
+    @threaded
+    def test_waits_on_service():
+        ...
+    """
+    if callable(test_function):
+        test_function.__jet_threads__ = True
+        return test_function
+
+    def mark(function: Callable) -> Callable:
+        function.__jet_threads__ = test_function
+        return function
+
+    return mark
+
+
+def budget(
+    wall: float | None = None, cpu: float | None = None, memory: int | None = None
+) -> Callable:
+    """Fails the test as over budget when it takes more than `wall` or `cpu` seconds,
+    or allocates more than `memory` bytes at its peak. Limits left out come from the
+    module's JET_BUDGET, if any.
+
+    @budget(wall=0.5, memory=64 * 2**20)
+    def test_parses_large_file():
+        ...
+    """
+    limits = {"wall": wall, "cpu": cpu, "memory": memory}
+    limits = {measure: limit for measure, limit in limits.items() if limit is not None}
+
+    def mark(test_function: Callable) -> Callable:
+        test_function.__jet_budget__ = limits
+        return test_function
+
+    return mark
+
+
+def fixture(function: Callable | None = None, scope: str = "test") -> Callable:
+    """Makes a function a fixture, given to the tests that name it as a parameter.
+    A generator fixture yields its value and tears it down after the yield. The value is
+    built once per test, module, session or worker, following `scope`.
+
+    @fixture(scope="module")
+    def database():
+        db = connect()
+        yield db
+        db.close()
+    """
+    if scope not in SCOPES:
+        scopes = ", ".join(SCOPES)
+        raise ValueError(f"Unknown fixture scope '{scope}'. Scopes are {scopes}")
+
+    def mark(function: Callable) -> Callable:
+        function.__jet_fixture__ = scope
+        return function
+
+    return mark if function is None else mark(function)
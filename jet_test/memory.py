@@ -0,0 +1,125 @@
+"""Memory instrumentation.
+With --memory every test runs under tracemalloc: its results keep the peak of the python
+allocations it made, the growth of the resident memory of the process, and, when it did
+not pass, the source lines holding the most memory as it ended.
+Tracing is process wide, so measured tests run one at a time in each process.
+"""
+# standard imports
+import dataclasses
+import inspect
+import itertools
+import mmap
+import os
+import sys
+import tracemalloc
+
+# self imports
+from jet_test.classes import Error
+
+# allocation sites kept for a test that did not pass
+SITES = 10
+
+# allocations made by jet itself, or by tracing
+_IGNORED = (
+    os.path.dirname(__file__) + os.sep,
+    tracemalloc.__file__,
+    "<frozen importlib",
+)
+
+
+def rss() -> int:
+    """Resident memory of the process in bytes, 0 where /proc is not available."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * mmap.PAGESIZE
+    except OSError:
+        return 0
+
+
+def format_bytes(n: int) -> str:
+    for unit in ["B", "kB", "MB", "GB"]:
+        if abs(n) < 1024 or unit == "GB":
+            break
+        n /= 1024
+    return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+
+
+def _sites(snapshot: tracemalloc.Snapshot) -> list[list]:
+    """[file:line, bytes, blocks] of the lines holding the most memory."""
+    # grouping by line first is much faster than filtering every trace
+    statistics = snapshot.statistics("lineno")
+    sites = (s for s in statistics if not s.traceback[0].filename.startswith(_IGNORED))
+    return [
+        [f"{s.traceback[0].filename}:{s.traceback[0].lineno}", s.size, s.count]
+        for s in itertools.islice(sites, SITES)
+    ]
+
+
+class MemoryMeter:
+    """Measures the test run inside it, does nothing when not `active`.
+    Allocation sites are also kept when the peak goes over `limit` bytes. They are taken
+    as `routine` returns, while its locals still hold their memory, unless another
+    tracer (a debugger, coverage) is active."""
+
+    peak = 0
+    rss = 0
+    sites = None
+    _tracing_calls = False
+
+    def __init__(self, active: bool = True, limit: int | None = None, routine=None):
+        self.active = active
+        self.limit = limit
+        self.code = getattr(inspect.unwrap(routine), "__code__", None)
+
+    def _over(self) -> bool:
+        peak = tracemalloc.get_traced_memory()[1] - self._traced
+        return self.limit is not None and peak > self.limit
+
+    def _trace(self, frame, event, arg):
+        if frame.f_code is not self.code:
+            return None
+        frame.f_trace_lines = False
+        return self._on_return
+
+    def _on_return(self, frame, event, arg):
+        if event == "return" and self.sites is None and self._over():
+            self.sites = _sites(tracemalloc.take_snapshot())
+        return self._on_return
+
+    def __enter__(self):
+        if not self.active:
+            return self
+        # a test module may trace on its own, then only the peak is reset
+        self.tracing = tracemalloc.is_tracing()
+        if not self.tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._traced = tracemalloc.get_traced_memory()[0]
+        self._rss = rss()
+        if self.limit is not None and self.code is not None and sys.gettrace() is None:
+            sys.settrace(self._trace)
+            self._tracing_calls = True
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if not self.active:
+            return
+        if self._tracing_calls:
+            sys.settrace(None)
+            self._tracing_calls = False
+        self.rss = rss() - self._rss
+        self.peak = tracemalloc.get_traced_memory()[1] - self._traced
+        if exc_type is not None:
+            # the traceback still holds the frames, and what their locals allocated
+            self.sites = _sites(tracemalloc.take_snapshot())
+        elif self.sites is None and self._over():
+            self.sites = _sites(tracemalloc.take_snapshot())
+        if not self.tracing:
+            tracemalloc.stop()
+
+    def measured(self, error: Error) -> Error:
+        if not self.active:
+            return error
+        return dataclasses.replace(
+            error, memory=self.peak, rss=self.rss, allocations=self.sites
+        )
@@ -0,0 +1,98 @@
+"""Merging results.
+`jet merge` combines the results files of runs split with --shard into a single
+jet.results.json, with the summary of the whole suite, that `jet see` can browse.
+"""
+# standard imports
+import os
+import re
+
+# self imports
+import jet_test.runner as runner
+import jet_test.schedule as schedule
+from jet_test.seer import read_results, _read_error
+from jet_test.writers import JsonWriter
+from jet_test.classes import MergeConfig, JetError, Error, Test, Module
+
+# dependencies
+from rich.console import Console
+
+_COUNT = re.compile(r"(\d+) (\w+)")
+
+
+def _counts(summary: str, tracker: dict) -> dict:
+    """Adds the counts of a summary line, e.g. 'JET: 5 pass, 2 failed', to a tracker."""
+    types = {key.lower(): key for key in tracker if key != "n_tests"}
+    for n, name in _COUNT.findall(summary):
+        if name in types:
+            tracker[types[name]] += int(n)
+            tracker["n_tests"] += int(n)
+    return tracker
+
+
+def _passed(timing: dict) -> Error:
+    # passing tests are only stored with their timing
+    return Error(
+        type="Pass",
+        name="Pass",
+        description="",
+        line=0,
+        variables={},
+        out="",
+        test=Test(
+            name=timing["name"],
+            doc="",
+            module=Module(name=timing["module"], doc="", path=timing["path"]),
+        ),
+        wall=timing["wall"],
+        cpu=timing["cpu"],
+        memory=timing.get("memory", 0),
+        rss=timing.get("rss", 0),
+        setup=timing.get("setup", 0.0),
+    )
+
+
+def merge(filenames: list[str], writer: JsonWriter) -> tuple[dict, list[Error]]:
+    """Hands every test of the results files to the writer, returns the total counts
+    and the results."""
+    tracker = runner._new_tracker(0)
+    merged = []
+    for filename in filenames:
+        try:
+            results = read_results(filename)
+        except FileNotFoundError:
+            raise JetError(f"No results file found at {filename}")
+        for entry in results["tests"]:
+            merged.append(_read_error(entry))
+        for timing in results.get("timings", []):
+            if timing["type"] == "Pass":
+                merged.append(_passed(timing))
+        tracker = _counts(results["summary"], tracker)
+    for error in merged:
+        writer.write(error)
+    return tracker, merged
+
+
+def Merge(config: MergeConfig) -> None:
+    color_dict = {
+        "Pass": config.pass_color,
+        "Failed": config.failed_color,
+        "Error": config.error_color,
+        "Warning": config.warning_color,
+        "Timeout": config.error_color,
+        "Budget": config.failed_color,
+        "Cached": "dim",
+    }
+    os.makedirs(config.path, exist_ok=True)
+    writer = JsonWriter(config.path)
+    tracker, results = merge(config.files, writer)
+    summary, summary_bw = runner.build_summary(tracker, color_dict)
+    writer.close(summary_bw)
+    # shards leave the durations alone, so every one of them splits the same way
+    schedule.update_durations(results, config.path)
+
+    console = Console()
+    console.print(
+        f"Merged {len(config.files)} results files into "
+        f"{os.path.relpath(writer.filename)}"
+    )
+    console.print(summary)
@@ -0,0 +1,272 @@
+"""Multi-process test execution.
+Sends Test work units to supervised worker processes and streams back the results.
+A worker that runs past the deadline of its test, or dies, is killed and replaced so the
+rest of the suite keeps its throughput.
+"""
+# standard imports
+import collections
+import multiprocessing
+import multiprocessing.connection
+import os
+import shutil
+import signal
+import tempfile
+import time
+from typing import Callable, Iterator
+
+# self imports
+from jet_test.capture import read_fd
+from jet_test.classes import Test, Error
+
+# seconds a closing worker gets to run its finalizer
+CLOSE_TIMEOUT = 10
+
+
+def crash_error(test: Test, exception: BaseException, out: str = "") -> Error:
+    return Error(
+        type="Error",
+        name=type(exception).__name__,
+        description=f"Worker crashed while running test: {exception}",
+        line=0,
+        variables={},
+        out=out,
+        test=test,
+    )
+
+
+def timeout_error(test: Test, limit: float, elapsed: float, out: str) -> Error:
+    return Error(
+        type="Timeout",
+        name="Timeout",
+        description=f"Test did not finish within {limit:g} seconds",
+        line=0,
+        variables={},
+        out=out,
+        test=test,
+        wall=elapsed,
+    )
+
+
+def _worker(
+    connection, spool, work, timeout_of, initializer, initargs, finalizer
+) -> None:
+    # ctrl-c stops the runner, which then shuts the workers down itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if initializer is not None:
+        initializer(*initargs)
+    while (message := connection.recv()) is not None:
+        test, args = message
+        limit = None
+        if timeout_of is not None:
+            try:
+                limit = timeout_of(test)
+            except Exception:
+                pass
+        connection.send(("start", limit))
+        # output goes through a file so the supervisor can read it after a kill
+        with open(spool, "w+", buffering=1) as output:
+            try:
+                error = work(test, *args, output=output)
+            except BaseException as exception:
+                error = crash_error(test, exception)
+        connection.send(("done", error))
+    reported = finalizer() if finalizer is not None else []
+    try:
+        connection.send(reported or [])
+    except OSError:
+        pass
+
+
+class _Process:
+    """A worker process and the test it is running, if any."""
+
+    def __init__(self, pool: "Pool"):
+        pool.spawned += 1
+        self.spool = os.path.join(pool.directory, f"worker-{pool.spawned}.out")
+        self.connection, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_worker,
+            args=(
+                child,
+                self.spool,
+                pool.work,
+                pool.timeout_of,
+                pool.initializer,
+                pool.initargs,
+                pool.finalizer,
+            ),
+            daemon=True,
+        )
+        self.process.start()
+        child.close()
+        self.test = None
+        self.started = 0.0
+        self.limit = None
+
+    @property
+    def deadline(self) -> float | None:
+        return None if self.limit is None else self.started + self.limit
+
+    def assign(self, test: Test, args: tuple, timeout: float | None) -> None:
+        self.test = test
+        self.started = time.perf_counter()
+        self.limit = timeout
+        self.connection.send((test, args))
+
+    def output(self) -> str:
+        try:
+            with open(self.spool, "rb") as f:
+                return read_fd(f.fileno())[0]
+        except FileNotFoundError:
+            return ""
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class Pool:
+    """Worker processes that take one test at a time from a shared queue.
+
+    `work(test, *args, output=file)` runs a test in a worker and returns its Error.
+    `timeout_of(test)` also runs in the worker and returns the test's own time limit, if any,
+    which takes precedence over the timeout of the run. `finalizer()` runs in a worker
+    closed by the pool, not in one killed at a deadline, and returns (test, error) pairs
+    of what went wrong, handed back by `close()`.
+    """
+
+    def __init__(
+        self,
+        n_jobs: int,
+        work: Callable[..., Error],
+        timeout_of: Callable[[Test], float | None] | None = None,
+        initializer: Callable | None = None,
+        initargs: tuple = (),
+        finalizer: Callable | None = None,
+    ):
+        self.work = work
+        self.timeout_of = timeout_of
+        self.initializer = initializer
+        self.initargs = initargs
+        self.finalizer = finalizer
+        self.directory = tempfile.mkdtemp(prefix="jet-")
+        self.spawned = 0
+        self.processes = [_Process(self) for _ in range(n_jobs)]
+
+    def _replace(self, process: _Process) -> None:
+        process.kill()
+        self.processes[self.processes.index(process)] = _Process(self)
+
+    def run(
+        self,
+        tests: list[Test],
+        args: tuple = (),
+        timeout: float | None = None,
+        respawn: bool = True,
+    ) -> Iterator[tuple[Test, Error]]:
+        """Yields (test, error) pairs in order of completion.
+        Tests are sent without their routine, workers import the module themselves.
+        Closing the iterator early kills the workers still busy with a test, and
+        replaces them only with `respawn`, for a pool that outlives the run.
+        """
+        pending = collections.deque(
+            Test(name=t.name, doc=t.doc, module=t.module) for t in tests
+        )
+        try:
+            while pending or any(p.test is not None for p in self.processes):
+                for process in self.processes:
+                    if process.test is None and pending:
+                        process.assign(pending.popleft(), args, timeout)
+
+                busy = [p for p in self.processes if p.test is not None]
+                deadlines = [p.deadline for p in busy if p.deadline is not None]
+                wait = None
+                if deadlines:
+                    wait = max(0.0, min(deadlines) - time.perf_counter())
+                ready = multiprocessing.connection.wait(
+                    [p.connection for p in busy], timeout=wait
+                )
+
+                for process in busy:
+                    if process.connection not in ready:
+                        continue
+                    try:
+                        kind, payload = process.connection.recv()
+                    except (EOFError, OSError):
+                        test, out = process.test, process.output()
+                        exitcode = process.process.exitcode
+                        self._replace(process)
+                        exception = ChildProcessError(f"exit code {exitcode}")
+                        yield test, crash_error(test, exception, out)
+                        continue
+                    if kind == "start":
+                        # limits count from when the test starts, not from the import
+                        process.started = time.perf_counter()
+                        process.limit = payload if payload is not None else timeout
+                        continue
+                    test, process.test = process.test, None
+                    yield test, payload
+
+                now = time.perf_counter()
+                for process in list(self.processes):
+                    if process.test is None or process.deadline is None:
+                        continue
+                    if now >= process.deadline:
+                        test, out = process.test, process.output()
+                        elapsed = now - process.started
+                        error = timeout_error(test, process.limit, elapsed, out)
+                        self._replace(process)
+                        yield test, error
+        finally:
+            for process in list(self.processes):
+                if process.test is None:
+                    continue
+                if respawn:
+                    self._replace(process)
+                else:
+                    process.kill()
+                    self.processes.remove(process)
+
+    def close(self) -> list[tuple[Test, Error]]:
+        """Stops the workers, returns what their finalizers reported."""
+        for process in self.processes:
+            try:
+                process.connection.send(None)
+            except OSError:
+                pass
+        reported = []
+        for process in self.processes:
+            try:
+                if process.connection.poll(CLOSE_TIMEOUT):
+                    reported.extend(process.connection.recv())
+            except (EOFError, OSError):
+                pass
+            process.process.join(timeout=1)
+            if process.process.is_alive():
+                process.kill()
+        shutil.rmtree(self.directory, ignore_errors=True)
+        return reported
+
+
+def run_parallel(
+    tests: list[Test],
+    n_jobs: int,
+    work: Callable[..., Error],
+    timeout: float | None = None,
+    timeout_of: Callable[[Test], float | None] | None = None,
+    args: tuple = (),
+    finalizer: Callable | None = None,
+) -> Iterator[tuple[Test, Error]]:
+    """Runs `work(test, *args)` on every test in `n_jobs` supervised processes.
+    Yields (test, error) pairs in order of completion.
+    """
+    pool = Pool(n_jobs, work, timeout_of=timeout_of, finalizer=finalizer)
+    try:
+        # the pool is closed right after, workers stopped early are not replaced
+        yield from pool.run(tests, args=args, timeout=timeout, respawn=False)
+    except BaseException:
+        pool.close()
+        raise
+    # what the finalizers of the workers reported, e.g. failed fixture teardowns
+    yield from pool.close()
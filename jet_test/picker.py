@@ -0,0 +1,256 @@
+"""Built-in terminal selector.
+Lists items with a title and a faint description, filters them with an incremental fuzzy
+match as you type and only draws the items that fit on screen, so it stays responsive
+with tens of thousands of entries.
+
+Keys: type to filter, up/down (or ctrl-p/ctrl-n) to move, page up/down to jump,
+tab to toggle the item under the cursor, enter to confirm, esc or ctrl-c to cancel.
+Where the terminal cannot be read key by key (no termios, e.g. on Windows) the items are
+numbered and chosen by typing their numbers.
+"""
+# standard imports
+import os
+import re
+import select
+import shutil
+import sys
+
+# self imports
+from jet_test.classes import JetError
+
+_RESET = "\x1b[0m"
+_FAINT = "\x1b[2m"
+_BOLD = "\x1b[1m"
+
+_KEYS = {
+    "\x1b[A": "up",
+    "\x1bOA": "up",
+    "\x10": "up",
+    "\x1b[B": "down",
+    "\x1bOB": "down",
+    "\x0e": "down",
+    "\x1b[5~": "page_up",
+    "\x1b[6~": "page_down",
+    "\t": "toggle",
+    "\r": "enter",
+    "\n": "enter",
+    "\x7f": "backspace",
+    "\x08": "backspace",
+    "\x1b": "cancel",
+    "\x03": "cancel",
+    "\x04": "cancel",
+}
+
+
+def _color(color: str, background: bool = False) -> str:
+    """ANSI sequence for a terminal256 number or a hex color, as gum accepts them."""
+    layer = 48 if background else 38
+    if color.isdigit():
+        return f"\x1b[{layer};5;{color}m"
+    if color.startswith("#") and len(color) == 7:
+        r, g, b = (int(color[i : i + 2], 16) for i in (1, 3, 5))
+        return f"\x1b[{layer};2;{r};{g};{b}m"
+    return ""
+
+
+def fuzzy_filter(haystacks: list[str], candidates: list[int], query: str) -> list[int]:
+    """Indices of `candidates` whose haystack contains the query as a subsequence."""
+    if not query:
+        return candidates
+    pattern = re.compile(".*?".join(map(re.escape, query.lower())))
+    return [i for i in candidates if pattern.search(haystacks[i])]
+
+
+class Picker:
+    def __init__(
+        self,
+        titles: list[str],
+        descriptions: list[str],
+        header: list[str],
+        limit: int | None,
+        color: str,
+    ):
+        self.titles = titles
+        self.descriptions = descriptions
+        self.haystacks = [f"{t} {d}".lower() for t, d in zip(titles, descriptions)]
+        self.header = header
+        self.limit = limit
+        self.color = _color(color)
+        self.query = ""
+        self.history = [(self.query, list(range(len(titles))))]
+        self.cursor = 0
+        self.top = 0
+        self.selected = set()
+        self.drawn = 0
+
+    @property
+    def matches(self) -> list[int]:
+        return self.history[-1][1]
+
+    def _filter(self) -> None:
+        # narrowing a query only needs to look at the current matches
+        while self.history and not self.query.startswith(self.history[-1][0]):
+            self.history.pop()
+        if self.history[-1][0] != self.query:
+            matches = fuzzy_filter(self.haystacks, self.matches, self.query)
+            self.history.append((self.query, matches))
+        self.cursor = self.top = 0
+
+    def _rows(self) -> int:
+        lines = shutil.get_terminal_size().lines
+        return max(1, (lines - len(self.header) - 3) // 2)
+
+    def _prefix(self, index: int) -> str:
+        if self.limit == 1:
+            return ""
+        return "[✓] " if index in self.selected else "[ ] "
+
+    def render(self) -> str:
+        rows = self._rows()
+        if self.cursor < self.top:
+            self.top = self.cursor
+        elif self.cursor >= self.top + rows:
+            self.top = self.cursor - rows + 1
+
+        width = shutil.get_terminal_size().columns
+        lines = list(self.header)
+        count = f"{len(self.matches)}/{len(self.titles)}"
+        lines.append(f"   {self.color}>{_RESET} {self.query}  {_FAINT}{count}{_RESET}")
+        for position in range(self.top, min(self.top + rows, len(self.matches))):
+            index = self.matches[position]
+            prefix = self._prefix(index)
+            title = (prefix + self.titles[index])[: width - 4]
+            if position == self.cursor or index in self.selected:
+                title = f"{self.color}{title}{_RESET}"
+            marker = f"{self.color}>{_RESET}" if position == self.cursor else " "
+            lines.append(f" {marker} {title}")
+            description = self.descriptions[index][: width - 4]
+            lines.append(f"   {_FAINT}{description}{_RESET}")
+
+        up = f"\x1b[{self.drawn}A\r" if self.drawn else "\r"
+        self.drawn = len(lines)
+        return up + "\x1b[J" + "\n".join(lines) + "\n"
+
+    def handle(self, key: str) -> bool:
+        """Updates the state for a key press, returns False once the choice is made."""
+        action = _KEYS.get(key)
+        if action == "up":
+            self.cursor = max(0, self.cursor - 1)
+        elif action == "down":
+            self.cursor = min(len(self.matches) - 1, self.cursor + 1)
+        elif action == "page_up":
+            self.cursor = max(0, self.cursor - self._rows())
+        elif action == "page_down":
+            self.cursor = min(len(self.matches) - 1, self.cursor + self._rows())
+        elif action == "toggle" and self.matches and self.limit != 1:
+            index = self.matches[self.cursor]
+            self.selected.symmetric_difference_update({index})
+            if self.limit is not None and len(self.selected) > self.limit:
+                self.selected.discard(index)
+        elif action == "backspace":
+            self.query = self.query[:-1]
+            self._filter()
+        elif action == "enter":
+            if not self.selected and self.matches:
+                self.selected.add(self.matches[self.cursor])
+            return False
+        elif action == "cancel":
+            self.selected = set()
+            return False
+        elif key.isprintable():
+            self.query += key
+            self._filter()
+        return True
+
+    def choice(self) -> list[str]:
+        return [self.titles[i] for i in sorted(self.selected)]
+
+    def indices(self) -> list[int]:
+        return sorted(self.selected)
+
+
+def _read_key(fd: int) -> str:
+    key = os.read(fd, 1)
+    if key == b"\x1b":
+        # escape sequences arrive together, a lone escape is a key press
+        while select.select([fd], [], [], 0.02)[0]:
+            key += os.read(fd, 1)
+            if len(key) > 2 and (key[-1:].isalpha() or key[-1:] == b"~"):
+                break
+    elif key[0] >= 0xC0:
+        # rest of a multi byte character
+        key += os.read(fd, 1 if key[0] < 0xE0 else 2 if key[0] < 0xF0 else 3)
+    return key.decode(errors="ignore")
+
+
+def _prompt(picker: Picker) -> None:
+    """Chooses by number, for terminals that cannot be read key by key."""
+    lines = list(picker.header)
+    for index, title in enumerate(picker.titles):
+        description = picker.descriptions[index]
+        lines.append(f"  {index + 1:>3}. {title}  {_FAINT}{description}{_RESET}")
+    print("\n".join(lines))
+    many = "" if picker.limit == 1 else ", separated by spaces"
+    try:
+        answer = input(f"  Number{many}: ")
+    except (EOFError, KeyboardInterrupt):
+        return
+    for word in answer.replace(",", " ").split():
+        if word.isdigit() and 1 <= int(word) <= len(picker.titles):
+            picker.selected.add(int(word) - 1)
+    if picker.limit is not None:
+        picker.selected = set(sorted(picker.selected)[: picker.limit])
+
+
+def pick(
+    titles: list[str],
+    descriptions: list[str],
+    title_text: str,
+    summary: str,
+    limit: int | None,
+    color: str,
+    background: str,
+    indices: bool = False,
+) -> list[str] | list[int]:
+    """Lets the user choose among the titles, returns the chosen ones in list order, or
+    their positions with `indices`, for titles that repeat."""
+    header = [
+        "",
+        f"    {_color(background, background=True)}{_BOLD}{title_text}{_RESET}",
+        "",
+        f"    {_FAINT}{summary}{_RESET}",
+        "",
+    ]
+    picker = Picker(titles, descriptions, header, limit, color)
+    try:
+        import termios
+        import tty
+    except ImportError:
+        if not sys.stdin.isatty():
+            raise JetError("Choosing needs a terminal. Use --all or --files instead")
+        _prompt(picker)
+        return picker.indices() if indices else picker.choice()
+
+    try:
+        fd = os.open("/dev/tty", os.O_RDWR)
+    except OSError:
+        raise JetError("Choosing needs a terminal. Use --all or --files instead")
+    attributes = termios.tcgetattr(fd)
+    out = sys.stdout
+    try:
+        tty.setcbreak(fd)
+        out.write("\x1b[?25l")
+        out.write(picker.render())
+        out.flush()
+        while picker.handle(_read_key(fd)):
+            out.write(picker.render())
+            out.flush()
+    except KeyboardInterrupt:
+        picker.selected = set()
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, attributes)
+        os.close(fd)
+        up = f"\x1b[{picker.drawn}A" if picker.drawn else ""
+        out.write(f"{up}\r\x1b[J\x1b[?25h")
+        out.flush()
+    return picker.indices() if indices else picker.choice()
@@ -5,6 +5,8 @@ import textwrap
 
 # self
 from jet_test.classes import Error
+from jet_test.memory import format_bytes
+from jet_test.checks import format_amount
 
 # dependencies
 from rich.panel import Panel
@@ -67,6 +69,44 @@ def observation(title: str, desc: str, text_width: int):
     return node
 
 
+def budget_usage(result: Error, text_width: int):
+    """Display what an over budget test used against what it was allowed"""
+    lines = [f"{'':8}{'used':>12}{'allowed':>12}"]
+    for measure, (used, allowed) in result.budget.items():
+        used, allowed = format_amount(measure, used), format_amount(measure, allowed)
+        lines.append(f"{measure:8}{used:>12}{allowed:>12}")
+    node = _center(
+        Panel(
+            _center(Text("\n" + "\n".join(lines) + "\n", style="dim")),
+            title="Budget",
+            width=text_width + 4,
+            border_style="dim",
+        )
+    )
+    return node
+
+
+def allocations(result: Error, text_width: int):
+    """Display the lines holding the most memory when the test ended"""
+    lines = []
+    peak, rss = format_bytes(result.memory), format_bytes(result.rss)
+    for site, size, count in result.allocations:
+        room = text_width - 28
+        if len(site) > room:
+            site = "..." + site[-room + 3 :]
+        lines.append(f"{format_bytes(size):>9} {count:>8} blocks  {site}")
+    node = _center(
+        Panel(
+            _center(Text("\n" + "\n".join(lines) + "\n", style="dim")),
+            title="Top Allocations",
+            subtitle=f"peak {peak}, rss {rss}",
+            width=text_width + 4,
+            border_style="dim",
+        )
+    )
+    return node
+
+
 def captured_output(output: str, text_width: int):
     """Display captured output"""
     node = _center(
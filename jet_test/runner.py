@@ -6,18 +6,37 @@ import os
 import inspect
 import importlib.util
 import sys
-import traceback
 import warnings
-import json
 import io
+import itertools
+import threading
+import time
+import asyncio
+import tempfile
+import shutil
+import dataclasses
 from contextlib import redirect_stdout
-from typing import Any
-from dataclasses import asdict
+from typing import Callable, Iterator
 
 # self imports
 import jet_test.ui as ui
 import jet_test.checks as jetcheck
-from jet_test.classes import RunConfig, Module, Test, Error
+import jet_test.collect as collect
+import jet_test.cache as cache
+import jet_test.server as server
+import jet_test.watch as watch
+import jet_test.schedule as schedule
+import jet_test.snapshot as snapshot
+import jet_test.capture as capture
+import jet_test.aio as aio
+import jet_test.threads as jetthreads
+import jet_test.history as history
+import jet_test.memory as memory
+import jet_test.fixtures as fixtures
+from jet_test.parallel import run_parallel
+from jet_test.seer import load_index
+from jet_test.writers import JsonWriter, JsonLinesWriter, JUnitWriter, TapWriter
+from jet_test.classes import RunConfig, Module, Test, Error, JetError
 
 # dependencies
 from rich.text import Text
@@ -33,6 +52,21 @@ from rich.progress import (
 
 warnings.filterwarnings("error")
 
+# seconds between two redraws of the progress and the test lines
+FRAME = 0.1
+
+# tests listed by their peak memory at the end of a run with --memory
+HEAVIEST = 5
+
+_SYMBOLS = {
+    "Pass": "\u2713",
+    "Cached": "\u2713",
+    "Failed": "\u2717",
+    "Error": "!",
+    "Timeout": "\u29d6",
+    "Budget": "\u25b2",
+}
+
 
 class CompletedColumn(ProgressColumn):
     """Renders completed count/total, e.g. '  10/1000'.
@@ -68,6 +102,28 @@ class CompletedColumn(ProgressColumn):
         )
 
 
+class Stopwatch:
+    """Measures the wall and cpu time spent inside a with block, even if it raises.
+    Without a cpu `clock`, e.g. for tests sharing a thread, only wall time is measured.
+    """
+
+    wall = 0.0
+    cpu = 0.0
+
+    def __init__(self, clock: Callable[[], float] | None = time.process_time):
+        self.clock = clock
+
+    def __enter__(self):
+        self._wall = time.perf_counter()
+        self._cpu = self.clock() if self.clock is not None else 0.0
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wall = time.perf_counter() - self._wall
+        if self.clock is not None:
+            self.cpu = self.clock() - self._cpu
+
+
 class ErrorDuringImport(Exception):
     """Errors that occurred while trying to import something to document it."""
 
@@ -105,58 +161,150 @@ def _clean_name(path: str) -> str:
     return mod_name.capitalize()
 
 
-def _get_module_data(path: str) -> Module:
-    module = _importfile(path)
+_imported = {}
+
+
+def _load_module(path: str):
+    """Imports a test module once per process, again if its file changed since."""
+    mtime = os.stat(path).st_mtime_ns
+    if path not in _imported or _imported[path][0] != mtime:
+        _imported[path] = (mtime, _importfile(path))
+    return _imported[path][1]
+
+
+def _unload_modules(files: set[str]) -> None:
+    """Forgets imported modules loaded from `files` so the next import reads them again."""
+    for name, module in list(sys.modules.items()):
+        file = getattr(module, "__file__", None)
+        if file and os.path.abspath(file) in files and not name.startswith("jet_test"):
+            del sys.modules[name]
+    for path in list(_imported):
+        if os.path.abspath(path) in files:
+            del _imported[path]
+
+
+def _get_module_data(path: str, static: bool = False) -> Module:
+    if static:
+        doc, _ = collect.parse_file(path)
+        return Module(name=_clean_name(path), doc=doc, path=path)
+    module = _load_module(path)
     return Module(name=_clean_name(path), doc=module.__doc__, path=path, module=module)
 
 
-def _is_jsonable(x: Any) -> bool:
-    try:
-        json.dumps(x)
-        return True
-    except:
-        return False
+def _load_routine(test: Test) -> Test:
+    """Attaches the routine to a test that was sent without one (e.g. to a worker)."""
+    module = _load_module(test.module.path)
+    for key, value in inspect.getmembers(module, inspect.isroutine):
+        # looked up by the name it has in the module, like the static collection does,
+        # as a decorator that does not copy __name__ would hide the test otherwise
+        if key.startswith("test") and _clean_name(key) == test.name:
+            return dataclasses.replace(test, routine=value)
+    raise LookupError(f"Test '{test.name}' not found in {test.module.path}")
+
+
+def _timeout_of(test: Test) -> float | None:
+    """Time limit set on the test with marks.timeout, or on its module with JET_TIMEOUT."""
+    if test.routine is None:
+        test = _load_routine(test)
+    limit = getattr(test.routine, "__jet_timeout__", None)
+    if limit is None:
+        module = test.module.module or _load_module(test.module.path)
+        limit = getattr(module, "JET_TIMEOUT", None)
+    return limit
+
+
+def _budget_of(test: Test) -> dict:
+    """Limits of the test set with marks.budget, over those of its module's JET_BUDGET."""
+    if test.routine is None:
+        test = _load_routine(test)
+    module = test.module.module or _load_module(test.module.path)
+    budget = dict(getattr(module, "JET_BUDGET", None) or {})
+    budget.update(getattr(test.routine, "__jet_budget__", {}))
+    return budget
+
+
+def _fingerprints(tests: list[Test], roots: list[str]) -> dict[str, str]:
+    sources = {}
+    fingerprints = {}
+    for test in tests:
+        path = test.module.path
+        if path not in sources:
+            sources[path] = {
+                _clean_name(k): v for k, v in cache.function_sources(path).items()
+            }
+        fingerprints[cache.key(path, test.name)] = cache.fingerprint(
+            path, sources[path].get(test.name, ""), roots
+        )
+    return fingerprints
+
+
+def _cached_error(test: Test) -> Error:
+    return Error(
+        type="Cached",
+        name="Cached",
+        description="",
+        line=0,
+        variables={},
+        out="",
+        test=Test(name=test.name, doc=test.doc, module=test.module),
+    )
+
 
+def _previous_failures(path: str) -> set[tuple[str, str]]:
+    """(module path, test name) of every test that did not pass in the last run."""
+    try:
+        entries, _, _ = load_index(path)
+    except JetError:
+        return set()
+    return {(os.path.abspath(e.path), e.name) for e in entries}
+
+
+def _failed_before(test: Test, failures: set[tuple[str, str]]) -> bool:
+    return (os.path.abspath(test.module.path), test.name) in failures
+
+
+def _pass(test: Test, stopwatch: Stopwatch) -> Error:
+    return Error(
+        type="Pass",
+        name="Pass",
+        description="",
+        line=0,
+        variables={},
+        out="",
+        test=Test(name=test.name, doc=test.doc, module=test.module),
+        wall=stopwatch.wall,
+        cpu=stopwatch.cpu,
+    )
 
-def _clean_variables(variables: dict) -> dict:
-    if variables is None:
-        return variables
-    if len(variables) == 0:
-        return variables
 
-    new_variables = {}
-    for k, v in variables.items():
-        if hasattr(v, "__name__"):
-            v = v.__name__
-        elif not _is_jsonable(v):
-            v = str(v)
-        new_variables[k] = v
-    return new_variables
+def _new_tracker(n_tests: int) -> dict:
+    tracker = {"n_tests": n_tests, "Pass": 0, "Cached": 0}
+    tracker.update({"Failed": 0, "Warning": 0, "Error": 0, "Timeout": 0, "Budget": 0})
+    return tracker
 
 
 def _track(error: Error, tracker: dict) -> dict:
-    if error is None:
-        tracker["Pass"] += 1
-    else:
-        tracker[error.type] += 1
+    tracker[error.type] += 1
     return tracker
 
 
-def get_modules(path: str, files: list) -> list[Module]:
+def get_modules(
+    path: str, files: list, static: bool = False, prefix: str | tuple = "test_"
+) -> list[Module]:
     modules = []
     if not files:
         for dirpath, subdirs, files in os.walk(path):
             for x in files:
-                if not (x.endswith(".py") and x.startswith("test_")):
+                if not (x.endswith(".py") and x.startswith(prefix)):
                     continue
-                modules.append(_get_module_data(os.path.join(dirpath, x)))
+                modules.append(_get_module_data(os.path.join(dirpath, x), static))
         return modules
 
     for x in files:
         x = os.path.split(x)[-1]
-        if not (x.endswith(".py") and x.startswith("test_")):
+        if not (x.endswith(".py") and x.startswith(prefix)):
             continue
-        modules.append(_get_module_data(os.path.join(path, x)))
+        modules.append(_get_module_data(os.path.join(path, x), static))
     return modules
 
 
@@ -182,19 +330,43 @@ def filter_modules(
     return [mod for mod in modules if mod.name in choices]
 
 
+def _get_static_routines(module: Module) -> list[Test]:
+    _, routines = collect.parse_file(module.path)
+    return [
+        Test(
+            name=_clean_name(key),
+            doc=doc if doc is not None else _clean_name(key),
+            module=module,
+            kind=kind,
+            threads=threads,
+            has_timeout=timeout,
+        )
+        for key, doc, kind, threads, timeout in routines
+    ]
+
+
 def get_routines(modules: list[Module]) -> list[Test]:
     tests = []
     for module in modules:
+        if module.module is None:
+            tests.extend(_get_static_routines(module))
+            continue
         for key, value in inspect.getmembers(module.module, inspect.isroutine):
             if not key.startswith("test"):
                 continue
             test = Test(
-                name=_clean_name(value.__name__),
-                doc=value.__doc__
-                if value.__doc__ is not None
-                else _clean_name(value.__name__),
+                name=_clean_name(key),
+                doc=value.__doc__ if value.__doc__ is not None else _clean_name(key),
                 routine=value,
                 module=Module(name=module.name, doc=module.doc, path=module.path),
+                kind="async" if inspect.iscoroutinefunction(value) else "sync",
+                threads=getattr(
+                    value,
+                    "__jet_threads__",
+                    getattr(module.module, "JET_THREADS", None),
+                ),
+                has_timeout=getattr(value, "__jet_timeout__", None) is not None
+                or getattr(module.module, "JET_TIMEOUT", None) is not None,
             )
 
             tests.append(test)
@@ -202,124 +374,486 @@ def get_routines(modules: list[Module]) -> list[Test]:
     return tests
 
 
-def run_tests(
+def _run_serial(
     tests: list[Test],
-    show_percentage: bool,
-    second_color: str,
+    fd: bool = False,
+    logs: str | None = None,
+    measure: bool = False,
+):
+    for test in tests:
+        yield test, evaluate(test, fd, logs, measure)
+
+
+def _in_threads(test: Test, threads: int) -> bool:
+    return bool(test.threads) or (threads > 0 and test.threads is not False)
+
+
+def _run_in_process(
+    tests: list[Test],
+    fd: bool,
+    logs: str | None,
+    async_limit: int | None,
+    threads: int,
+    measure: bool = False,
+) -> Iterator[tuple[Test, Error]]:
+    """Runs the tests in order within each kind: sync, then threaded, then async, then
+    those with a time limit of their own in a worker that is killed at the deadline.
+    Measuring memory runs the others one at a time."""
+    sync, threaded, concurrent, supervised = [], [], [], []
+    for test in tests:
+        if test.has_timeout:
+            supervised.append(test)
+            continue
+        if test.routine is None:
+            # the budget is declared on the routine, tests collected statically lack it
+            try:
+                test = _load_routine(test)
+            except (ErrorDuringImport, LookupError):
+                # reported as the test's result once it runs
+                pass
+        if measure or (test.routine is not None and "memory" in _budget_of(test)):
+            # peak memory is only measured for a test running alone
+            sync.append(test)
+        elif test.kind == "async":
+            concurrent.append(test)
+        elif _in_threads(test, threads):
+            threaded.append(test)
+        else:
+            sync.append(test)
+    outcomes = itertools.chain(
+        _run_serial(sync, fd, logs, measure),
+        jetthreads.run_threads(threaded, threads or jetthreads.THREADS, logs),
+        aio.run_async(concurrent, async_limit or aio.LIMIT, logs),
+    )
+    if not supervised:
+        return outcomes
+    return itertools.chain(
+        outcomes,
+        run_parallel(
+            supervised,
+            1,
+            evaluate,
+            timeout_of=_timeout_of,
+            args=(fd, logs, measure),
+            finalizer=fixtures.close,
+        ),
+    )
+
+
+def _outcomes(
+    tests: list[Test],
+    cached: list[Test],
+    n_jobs: int,
+    remote: str | None,
+    timeout: float | None,
+    fd: bool,
+    logs: str | None,
+    async_limit: int | None,
+    threads: int,
+    measure: bool = False,
+    leading: int = 0,
+):
+    """(test, error) pairs of the cached tests, then of the tests run by the chosen engine.
+    Run in process, tests opted in to threads, or all with `threads`, share a thread pool
+    and async tests go last and overlap on one event loop; in workers each runs on its own.
+    Tests with a time limit of their own run in a supervised worker. The first `leading`
+    tests, those that failed before with --failed-first, finish before the others start.
+    Measuring memory runs the tests of a process one at a time.
+    """
+    if remote is not None:
+        outcomes = server.run_remote(tests, remote, timeout, fd, logs, measure)
+    elif n_jobs > 1 or timeout is not None:
+        outcomes = run_parallel(
+            tests,
+            n_jobs,
+            evaluate,
+            timeout,
+            _timeout_of,
+            args=(fd, logs, measure),
+            finalizer=fixtures.close,
+        )
+    else:
+        outcomes = itertools.chain(
+            _run_in_process(tests[:leading], fd, logs, async_limit, threads, measure),
+            _run_in_process(tests[leading:], fd, logs, async_limit, threads, measure),
+        )
+    cached_outcomes = ((test, _cached_error(test)) for test in cached)
+    return itertools.chain(cached_outcomes, outcomes)
+
+
+def _line_text(test: Test, error: Error) -> str:
+    if error.type in ("Pass", "Cached"):
+        return test.doc
+    return error.description if error.description else test.name
+
+
+def _record(outcomes, tracker: dict, results: list[Error], writers: list):
+    """Counts and stores every outcome as it arrives, passing it on for display."""
+    for test, error in outcomes:
+        _track(error, tracker)
+        if error.type != "Cached":
+            results.append(error)
+            for writer in writers:
+                writer.write(error)
+        yield test, error
+
+
+def _show_headless(
+    outcomes, quiet: bool, slowest: int, results: list[Error], measure: bool = False
+) -> None:
+    # plain buffered writes, no rich objects, for logs and CI
+    out = sys.stdout
+    for test, error in outcomes:
+        if not quiet:
+            out.write(f"{_SYMBOLS.get(error.type, '?')} {_line_text(test, error)}\n")
+    if slowest > 0:
+        out.write(build_slowest(results, slowest) + "\n")
+    if measure:
+        out.write(build_heaviest(results, HEAVIEST) + "\n")
+
+
+class _Lines:
+    """Test lines waiting to be printed. A thread of their own prints them every frame,
+    so a line never waits for the next test to finish, while the tests keep running on
+    the main thread, where the budget timers need them."""
+
+    def __init__(self, console: Console):
+        self.console = console
+        self.pending = []
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._print_every_frame, daemon=True)
+
+    def append(self, line: str) -> None:
+        with self.lock:
+            self.pending.append(line)
+
+    def flush(self) -> None:
+        with self.lock:
+            if self.pending:
+                self.console.print("\n".join(self.pending))
+                self.pending.clear()
+
+    def _print_every_frame(self) -> None:
+        while not self.stopped.wait(FRAME):
+            self.flush()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+        self.flush()
+
+
+def _show_progress(
+    outcomes,
+    tracker: dict,
+    results: list[Error],
     quiet: bool,
     color_dict: dict,
-) -> tuple[list[Error], str]:
-
+    show_percentage: bool,
+    second_color: str,
+    slowest: int,
+    fd: bool,
+    measure: bool = False,
+) -> None:
+    """Draws the progress bar at a fixed frame rate and prints the test lines in batches,
+    so rendering costs the same for ten tests as for a hundred thousand."""
     # maybe collapase this as its a bit ugly the second color thing
-    console = Console(theme=Theme({"progress.percentage": second_color}))
+    # with fd capture the progress keeps drawing on the terminal, not in the spool
+    terminal = capture.terminal() if fd else None
+    # lines print while a test runs, so the console must not follow sys.stdout into
+    # the capture of the test
+    console = Console(
+        file=terminal or sys.stdout, theme=Theme({"progress.percentage": second_color})
+    )
     progress_column = TaskProgressColumn() if show_percentage else CompletedColumn()
-    n_tests = len(tests)
-    results = []
-    tracker = {
-        "n_tests": n_tests,
-        "Pass": 0,
-        "Failed": 0,
-        "Warning": 0,
-        "Error": 0,
-    }
     with Progress(
         TextColumn("[progress.description]{task.description}"),
         BarColumn(),
         progress_column,
         console=console,
+        refresh_per_second=1 / FRAME,
     ) as progress:
-
-        task = progress.add_task("Running tests", total=n_tests)
-        for test in tests:
-            error = evaluate(test)
-            progress.update(task, advance=1, refresh=True)
-            tracker = _track(error, tracker)
-
-            if not quiet:
-                if error is None:
-                    error_type = "Pass"
-                    text = test.doc
-                else:
-                    error_type = error.type
-                    text = error.description if error.description else test.name
-                progress.console.print(
+        task = progress.add_task("Running tests", total=tracker["n_tests"])
+        with _Lines(progress.console) as lines:
+            for test, error in outcomes:
+                progress.advance(task)
+                if quiet:
+                    continue
+                lines.append(
                     build_summary_line(
-                        error_type=error_type,
-                        text=text,
+                        error_type=error.type,
+                        text=_line_text(test, error),
                         color_dict=color_dict,
                     )
                 )
 
-            if error is not None:
-                results.append(error)
-
-        summary, summary_bw = build_summary(tracker, color_dict)
+        summary, _ = build_summary(tracker, color_dict)
         if summary != "JET":
             progress.console.print(summary)
+        if slowest > 0:
+            progress.console.print(build_slowest(results, slowest, second_color))
+        if measure:
+            progress.console.print(build_heaviest(results, HEAVIEST, second_color))
 
+    if terminal is not None:
+        terminal.close()
     sys.stdout.write("\33[A")
     sys.stdout.write("\33[J\r")
+
+
+def run_tests(
+    tests: list[Test],
+    show_percentage: bool,
+    second_color: str,
+    quiet: bool,
+    color_dict: dict,
+    n_jobs: int = 1,
+    cached: list[Test] | None = None,
+    remote: str | None = None,
+    slowest: int = 0,
+    writers: list | None = None,
+    timeout: float | None = None,
+    fd: bool = False,
+    logs: str | None = None,
+    headless: bool = False,
+    async_limit: int | None = None,
+    threads: int = 0,
+    measure: bool = False,
+    leading: int = 0,
+) -> tuple[list[Error], str]:
+    """Runs the tests and returns the result of every test that was not cached.
+    Tests run in supervised workers, killed at their deadline, when running in parallel
+    or with a timeout; otherwise only those with a time limit of their own do.
+    """
+    cached = cached or []
+    writers = writers or []
+    results = []
+    tracker = _new_tracker(len(tests) + len(cached))
+    outcomes = _outcomes(
+        tests,
+        cached,
+        n_jobs,
+        remote,
+        timeout,
+        fd,
+        logs,
+        async_limit,
+        threads,
+        measure,
+        leading,
+    )
+    # shared fixtures of the run go once its tests are done, failed teardowns as errors
+    outcomes = itertools.chain(outcomes, fixtures.closing(fixtures.RUN_SCOPES))
+    outcomes = _record(outcomes, tracker, results, writers)
+
+    try:
+        if headless:
+            _show_headless(outcomes, quiet, slowest, results, measure)
+        else:
+            _show_progress(
+                outcomes,
+                tracker,
+                results,
+                quiet,
+                color_dict,
+                show_percentage,
+                second_color,
+                slowest,
+                fd,
+                measure,
+            )
+    finally:
+        # an interrupted run still tears down, worker scoped fixtures outlive the run,
+        # e.g. across the runs of --watch
+        fixtures.close(fixtures.RUN_SCOPES)
+    _, summary_bw = build_summary(tracker, color_dict)
+    if headless:
+        print(summary_bw)
     return results, summary_bw
 
 
 def do_pre_checks(test: Test) -> Error | None:
     # add custom tests and checks here.
-    error = jetcheck.arguments(test)
+    needed = jetcheck.required(test.routine)
+    try:
+        available = fixtures.definitions(test.module.path) if needed else {}
+    except ErrorDuringImport as exception:
+        # a broken jet_fixtures.py fails the tests that need it, not the run
+        error = _import_error(test, exception)
+        name = os.path.basename(exception.filename)
+        return dataclasses.replace(
+            error, description=f"Could not import {name}: {error.description}"
+        )
+    error = jetcheck.arguments(test, available)
+    if error is None:
+        error = jetcheck.limits(test, _budget_of(test))
     return error
 
 
-def evaluate(test: Test) -> Error | None:
-    error = do_pre_checks(test)
+def do_post_checks(test: Test, error: Error, interrupted: str | None = None) -> Error:
+    # add custom checks of finished tests here.
+    return jetcheck.budget(test, error, _budget_of(test), interrupted) or error
+
+
+def _import_error(test: Test, exception: ErrorDuringImport) -> Error:
+    return Error(
+        type="Error",
+        name=exception.exc.__name__,
+        description=str(exception.value),
+        line=getattr(exception.value, "lineno", None) or 1,
+        variables={},
+        out="",
+        test=Test(name=test.name, doc=test.doc, module=test.module),
+    )
+
+
+def _missing_error(test: Test, exception: LookupError) -> Error:
+    return Error(
+        type="Error",
+        name=type(exception).__name__,
+        description=str(exception),
+        line=0,
+        variables={},
+        out="",
+        test=Test(name=test.name, doc=test.doc, module=test.module),
+    )
+
+
+def _output(test: Test, output, logs: str | None) -> tuple[str, str | None]:
+    """Bounded output of a test, and the path of its full log when it was cut short."""
+    out, truncated = capture.read_output(output)
+    log = None
+    if truncated and logs is not None:
+        log = capture.keep_log(output, logs, f"{test.module.name}.{test.name}")
+    return out, log
+
+
+def _prepare(test: Test) -> tuple[Test, Error | None]:
+    """Attaches the routine of a test sent without one and runs the pre checks."""
+    if test.routine is None:
+        try:
+            test = _load_routine(test)
+        except ErrorDuringImport as exception:
+            return test, _import_error(test, exception)
+        except LookupError as exception:
+            return test, _missing_error(test, exception)
+    return test, do_pre_checks(test)
+
+
+def _failure(
+    test: Test,
+    exception: Exception,
+    error_type: str,
+    output,
+    logs: str | None,
+    stopwatch: Stopwatch,
+) -> Error:
+    frame, line = snapshot.innermost(exception.__traceback__, test.module.path)
+    out, log = _output(test, output, logs)
+    return Error(
+        type=error_type,
+        name=type(exception).__name__,
+        description=str(exception),
+        line=line,
+        variables=snapshot.capture(frame.f_locals),
+        out=out,
+        test=Test(name=test.name, doc=test.doc, module=test.module),
+        wall=stopwatch.wall,
+        cpu=stopwatch.cpu,
+        log=log,
+    )
+
+
+def _verdict(
+    test: Test,
+    exception: BaseException | None,
+    output,
+    logs: str | None,
+    stopwatch: Stopwatch,
+    used,
+    meter=None,
+) -> Error:
+    """Result of a test that raised `exception`, or passed when it is None, with the
+    memory and setup it took, checked against its budget. Every engine ends a test here.
+    """
+    interrupted = None
+    if exception is None:
+        error = _pass(test, stopwatch)
+    elif isinstance(exception, jetcheck.BudgetExceeded):
+        interrupted = exception.measure
+        error = _failure(test, exception, "Budget", output, logs, stopwatch)
+    elif isinstance(exception, AssertionError):
+        error = _failure(test, exception, "Failed", output, logs, stopwatch)
+    elif isinstance(exception, Warning):
+        error = _failure(test, exception, "Warning", output, logs, stopwatch)
+    else:
+        error = _failure(test, exception, "Error", output, logs, stopwatch)
+    if meter is not None:
+        error = meter.measured(error)
+    return do_post_checks(test, used.timed(error), interrupted)
+
+
+def _call(routine, /, **kwargs) -> None:
+    """Calls a test, running the coroutine of an async test to completion."""
+    result = routine(**kwargs)
+    if inspect.iscoroutine(result):
+        asyncio.run(result)
+
+
+def evaluate(
+    test: Test,
+    fd: bool = False,
+    logs: str | None = None,
+    measure: bool = False,
+    output=None,
+) -> Error:
+    """Runs a test, capturing its output into `output` (a text file) when given.
+    With `fd` the capture also takes file descriptors 1 and 2, with `measure` its memory
+    use is recorded.
+    """
+    test, error = _prepare(test)
     if error is not None:
         return error
-    captured_output = io.StringIO()
+    captured_output = output
+    if output is None and fd:
+        captured_output = tempfile.TemporaryFile("w+", buffering=1)
+    elif output is None:
+        captured_output = io.StringIO()
+    if fd:
+        redirect = capture.FdCapture(captured_output)
+    else:
+        redirect = redirect_stdout(captured_output)
+    budget = _budget_of(test)
+    stopwatch = Stopwatch()
+    meter = memory.MemoryMeter(
+        active=measure or "memory" in budget,
+        limit=budget.get("memory"),
+        routine=test.routine,
+    )
+    used = fixtures.Fixtures(test)
     try:
-        with redirect_stdout(captured_output):
-            test.routine()
-        return None
-    except AssertionError as exception:
-        info = traceback.extract_tb(sys.exc_info()[2])[-1]
-        variables = inspect.trace()[-1][0].f_locals
-        return Error(
-            type="Failed",
-            name=type(exception).__name__,
-            description=str(exception),
-            line=info.lineno,
-            variables=_clean_variables(variables),
-            out=captured_output.getvalue(),
-            test=Test(name=test.name, doc=test.doc, module=test.module),
-        )
-    except Warning as exception:
-        info = traceback.extract_tb(sys.exc_info()[2])[-1]
-        variables = inspect.trace()[-1][0].f_locals
-        return Error(
-            type="Warning",
-            name=type(exception).__name__,
-            description=str(exception),
-            line=info.lineno,
-            variables=_clean_variables(variables),
-            out=captured_output.getvalue(),
-            test=Test(name=test.name, doc=test.doc, module=test.module),
-        )
-
-    except Exception as exception:
-        info = traceback.extract_tb(sys.exc_info()[2])[-1]
-        variables = inspect.trace()[-1][0].f_locals
-        return Error(
-            type="Error",
-            name=type(exception).__name__,
-            description=str(exception),
-            line=info.lineno,
-            variables=_clean_variables(variables),
-            out=captured_output.getvalue(),
-            test=Test(name=test.name, doc=test.doc, module=test.module),
-        )
+        # fixtures are built and torn down outside of the measures of the test
+        with redirect, used, stopwatch, meter, jetcheck.BudgetTimers(budget):
+            _call(test.routine, **used.kwargs)
+    except (jetcheck.BudgetExceeded, Exception) as exception:
+        error = _verdict(test, exception, captured_output, logs, stopwatch, used, meter)
+    else:
+        error = _verdict(test, None, captured_output, logs, stopwatch, used, meter)
+    finally:
+        if output is None:
+            captured_output.close()
+    return error
 
 
 def build_summary(tracker: dict, color_dict: dict) -> tuple[str, str]:
     s = "JET: "
     bw = "JET: "
-    for result in ["Pass", "Failed", "Error", "Warning"]:
+    for result in ["Pass", "Cached", "Failed", "Error", "Timeout", "Budget", "Warning"]:
         n = tracker[result]
         if n == 0:
             continue
@@ -328,24 +862,104 @@ def build_summary(tracker: dict, color_dict: dict) -> tuple[str, str]:
     return s[:-2], bw[:-2]
 
 
+def build_slowest(results: list[Error], n: int, color: str | None = None) -> str:
+    """Slowest tests, with rich markup when a color is given."""
+    slowest = sorted(results, key=lambda r: r.wall, reverse=True)[:n]
+    # setup is shown apart, when any of them built fixtures
+    with_setup = any(r.setup for r in slowest)
+    if color is None:
+        lines = [f"{len(slowest)} slowest tests"]
+        for r in slowest:
+            setup = f" {r.setup:8.3f}s setup" if with_setup else ""
+            lines.append(
+                f"{r.wall:8.3f}s {r.cpu:8.3f}s cpu{setup}"
+                f"  {r.test.name} @ {r.test.module.name}"
+            )
+        return "\n".join(lines)
+    lines = [f"[{color}]{len(slowest)} slowest tests[/{color}]"]
+    for r in slowest:
+        setup = f" [dim]{r.setup:8.3f}s setup[/dim]" if with_setup else ""
+        lines.append(
+            f"[{color}]{r.wall:8.3f}s[/{color}] [dim]{r.cpu:8.3f}s cpu[/dim]{setup}"
+            f"  {r.test.name} @ {r.test.module.name}"
+        )
+    return "\n".join(lines)
+
+
+def build_heaviest(results: list[Error], n: int, color: str | None = None) -> str:
+    """Tests with the highest peak of python allocations, as build_slowest."""
+    heaviest = sorted(results, key=lambda r: r.memory, reverse=True)[:n]
+    title = f"{len(heaviest)} heaviest tests"
+    lines = [title if color is None else f"[{color}]{title}[/{color}]"]
+    for r in heaviest:
+        peak = f"{memory.format_bytes(r.memory):>9} peak"
+        rss = f"{memory.format_bytes(r.rss):>9} rss"
+        if color is not None:
+            peak, rss = f"[{color}]{peak}[/{color}]", f"[dim]{rss}[/dim]"
+        lines.append(f"{peak} {rss}  {r.test.name} @ {r.test.module.name}")
+    return "\n".join(lines)
+
+
 def build_summary_line(error_type: str, text: str, color_dict: dict) -> str:
     color = color_dict[error_type]
-    if error_type == "Pass":
-        tick = "\u2713"
-        return f"[{color}]{tick}[/{color}] {text}"
-    if error_type == "Failed":
-        cross = "\u2717"
-        return f"[{color}]{cross}[/{color}] {text}"
-    if error_type == "Error":
-        return f"[{color}]![/{color}] {text}"
-    return f"[{color}]?[/{color}] {text}"
+    return f"[{color}]{_SYMBOLS.get(error_type, '?')}[/{color}] {text}"
 
 
 def dump_results(results: list[Error], summary: str, path: str) -> None:
+    writer = JsonWriter(path)
+    for result in results:
+        writer.write(result)
+    writer.close(summary)
+
+
+def _writer(config: RunConfig) -> JsonWriter | JsonLinesWriter:
+    return JsonLinesWriter(config.path) if config.stream else JsonWriter(config.path)
+
+
+def _reporters(config: RunConfig) -> list:
+    """Writers of the CI reports asked for, besides the results file."""
+    reporters = []
+    if config.junit:
+        reporters.append(JUnitWriter(config.junit))
+    if config.tap:
+        reporters.append(TapWriter(config.tap))
+    return reporters
+
+
+def _logs(config: RunConfig) -> str | None:
+    if not config.keep_logs:
+        return None
+    return os.path.abspath(os.path.join(config.path, capture.LOG_DIR))
+
 
-    dictionary = {"summary": summary, "tests": [asdict(r) for r in results]}
-    with open(path + "/jet.results.json", "w") as fp:
-        json.dump(dictionary, fp)
+def _run(
+    tests: list[Test],
+    config: RunConfig,
+    color_dict: dict,
+    cached: list[Test] | None = None,
+    writers: list | None = None,
+    leading: int = 0,
+) -> tuple[list[Error], str]:
+    return run_tests(
+        tests,
+        show_percentage=config.show_percentage,
+        second_color=config.second_color,
+        quiet=config.quiet,
+        color_dict=color_dict,
+        n_jobs=config.n_jobs,
+        cached=cached,
+        remote=config.path if config.server else None,
+        slowest=config.slowest,
+        writers=writers,
+        timeout=config.timeout,
+        fd=config.capture == "fd",
+        logs=_logs(config),
+        headless=config.headless,
+        async_limit=config.async_limit,
+        threads=config.threads,
+        measure=config.memory,
+        leading=leading,
+    )
 
 
 def Run(config: RunConfig) -> None:
@@ -354,11 +968,24 @@ def Run(config: RunConfig) -> None:
         "Failed": config.failed_color,
         "Error": config.error_color,
         "Warning": config.warning_color,
+        "Timeout": config.error_color,
+        "Budget": config.failed_color,
+        "Cached": "dim",
     }
 
-    modules = get_modules(config.path, config.files)
+    if config.static:
+        collect.load_index(config.path)
+    modules = get_modules(config.path, config.files, static=config.static)
+
+    failures = set()
+    if config.last_failed or config.failed_first:
+        failures = _previous_failures(config.path)
 
-    if not config.run_all:
+    if config.last_failed and failures:
+        failed_paths = {path for path, _ in failures}
+        modules = [m for m in modules if os.path.abspath(m.path) in failed_paths]
+    # with no failures to rerun, --last-failed runs everything without asking
+    elif not config.run_all and not config.last_failed:
         modules = filter_modules(
             modules=modules,
             foreground=config.foreground,
@@ -366,13 +993,60 @@ def Run(config: RunConfig) -> None:
         )
 
     tests = get_routines(modules)
-
-    # if config.n_jobs ==1:
-    results, summary = run_tests(
-        tests,
-        show_percentage=config.show_percentage,
-        second_color=config.second_color,
-        quiet=config.quiet,
-        color_dict=color_dict,
+    if config.static:
+        collect.save_index(config.path)
+
+    durations = schedule.load_durations(config.path)
+    if config.shard is not None:
+        index, count = config.shard
+        tests = schedule.shard(tests, index, count, config.path, durations)
+    if config.n_jobs > 1 or config.server:
+        tests = schedule.longest_first(tests, durations, config.path)
+
+    if config.last_failed and failures:
+        tests = [test for test in tests if _failed_before(test, failures)]
+    elif config.failed_first:
+        tests.sort(key=lambda test: not _failed_before(test, failures))
+
+    selected = list(tests)
+    cached = []
+    fingerprints = {}
+    if config.cache or config.history:
+        fingerprints = _fingerprints(tests, roots=[config.path, os.getcwd()])
+    if config.cache:
+        stored = cache.load_cache(config.path)
+        hits = {k for k, v in fingerprints.items() if stored.get(k) == v}
+        cached = [t for t in tests if cache.key(t.module.path, t.name) in hits]
+        tests = [t for t in tests if cache.key(t.module.path, t.name) not in hits]
+
+    leading = 0
+    if config.failed_first and not config.last_failed:
+        leading = sum(_failed_before(test, failures) for test in tests)
+
+    if config.keep_logs:
+        shutil.rmtree(_logs(config), ignore_errors=True)
+    writers = [_writer(config)] + _reporters(config)
+    results, summary = _run(
+        tests, config, color_dict, cached=cached, writers=writers, leading=leading
     )
-    dump_results(results, summary, config.path)
+    for writer in writers:
+        writer.close(summary)
+    if config.shard is None:
+        # a shard updating them would change how the next shards split the suite
+        schedule.update_durations(results, config.path)
+    if config.history:
+        history.record(config.path, results, summary, fingerprints)
+
+    if config.cache:
+        failed = {
+            cache.key(r.test.module.path, r.test.name)
+            for r in results
+            if r.type != "Pass"
+        }
+        stored.update({k: v for k, v in fingerprints.items() if k not in failed})
+        for k in failed:
+            stored.pop(k, None)
+        cache.save_cache(stored, config.path)
+
+    if config.watch:
+        watch.watch(config, selected, results, color_dict)
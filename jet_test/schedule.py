@@ -0,0 +1,110 @@
+"""Duration-aware scheduling.
+Keeps a history of test durations across runs and orders work longest-processing-time-first,
+so the process pool, which hands out tests from a shared queue as workers free up, does not
+finish with a long test running on a single core.
+The same estimates split a suite into shards of similar duration for CI machines.
+"""
+# standard imports
+import heapq
+import json
+import os
+import statistics
+import zlib
+
+# self imports
+from jet_test.classes import Test, Error
+
+DURATIONS_FILE = "jet.durations.json"
+
+# weight of the latest run in the moving average of a test's duration
+SMOOTHING = 0.5
+
+
+def _key(path: str, name: str, root: str) -> str:
+    # relative, so a history made on another machine or checkout still applies
+    return f"{os.path.relpath(path, root)}::{name}"
+
+
+def load_durations(path: str) -> dict[str, float]:
+    try:
+        with open(os.path.join(path, DURATIONS_FILE), "r") as fp:
+            durations = json.load(fp)
+    except (FileNotFoundError, ValueError):
+        return {}
+    # older histories were keyed by absolute path
+    return {
+        (os.path.relpath(key, path) if os.path.isabs(key) else key): wall
+        for key, wall in durations.items()
+    }
+
+
+def update_durations(results: list[Error], path: str) -> None:
+    """Folds the wall time of every test that ran into the stored history."""
+    durations = load_durations(path)
+    for result in results:
+        key = _key(result.test.module.path, result.test.name, path)
+        previous = durations.get(key, result.wall)
+        durations[key] = SMOOTHING * result.wall + (1 - SMOOTHING) * previous
+    filename = os.path.join(path, DURATIONS_FILE)
+    with open(filename + ".tmp", "w") as fp:
+        json.dump(durations, fp)
+    os.replace(filename + ".tmp", filename)
+
+
+def estimate(tests: list[Test], durations: dict[str, float], root: str) -> list[float]:
+    """Expected duration of each test, falling back to its module's average and then
+    to the average of all known tests."""
+    known = {}
+    for test in tests:
+        key = _key(test.module.path, test.name, root)
+        if key in durations:
+            known.setdefault(test.module.path, []).append(durations[key])
+    means = {path: statistics.fmean(walls) for path, walls in known.items()}
+    default = statistics.fmean(durations.values()) if durations else 0.0
+
+    return [
+        durations.get(
+            _key(test.module.path, test.name, root),
+            means.get(test.module.path, default),
+        )
+        for test in tests
+    ]
+
+
+def longest_first(
+    tests: list[Test], durations: dict[str, float], root: str
+) -> list[Test]:
+    if not durations:
+        return tests
+    expected = estimate(tests, durations, root)
+    order = sorted(range(len(tests)), key=lambda i: expected[i], reverse=True)
+    return [tests[i] for i in order]
+
+
+def shard(
+    tests: list[Test], index: int, count: int, root: str, durations: dict[str, float]
+) -> list[Test]:
+    """Tests of shard `index` (1 based) out of `count`.
+    With a duration history, tests go longest first to the shard with the least expected
+    time so far; without one, a hash of each test's name picks its shard. Either way every
+    machine given the same tests and history computes the same split.
+    Tests keep their collected order.
+    """
+    keys = [_key(test.module.path, test.name, root) for test in tests]
+    if not durations:
+        return [
+            test
+            for test, key in zip(tests, keys)
+            if zlib.crc32(key.encode()) % count == index - 1
+        ]
+
+    expected = estimate(tests, durations, root)
+    order = sorted(range(len(tests)), key=lambda i: (-expected[i], keys[i]))
+    loads = [(0.0, n) for n in range(count)]
+    chosen = []
+    for i in order:
+        load, n = heapq.heappop(loads)
+        if n == index - 1:
+            chosen.append(i)
+        heapq.heappush(loads, (load + expected[i], n))
+    return [tests[i] for i in sorted(chosen)]
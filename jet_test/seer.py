@@ -1,6 +1,8 @@
 # standard
 import subprocess
 import json
+import os
+from dataclasses import astuple
 
 # self imports
 import jet_test.ui as ui
@@ -8,16 +10,27 @@ from jet_test.report import (
     report_result,
     observation,
     captured_output,
+    allocations,
+    budget_usage,
     function_and_locals_inline,
     function_and_locals_parallel,
 )
-from jet_test.classes import SeeConfig, JetError, Test, Module, Error
+from jet_test.memory import format_bytes
+from jet_test.classes import SeeConfig, JetError, Test, Module, Error, ResultEntry
+from jet_test.writers import (
+    RESULTS_FILE,
+    STREAM_FILE,
+    BENCH_FILE,
+    INDEX_SUFFIX,
+    INDEX_DESCRIPTION,
+    write_index,
+)
 
 # dependencies
 from rich.console import Console
 from rich.panel import Panel
 from rich.box import MINIMAL
-from rich.console import Console
+from rich.table import Table
 
 
 def _read_error(result: dict) -> Error:
@@ -28,6 +41,14 @@ def _read_error(result: dict) -> Error:
         line=result["line"],
         variables=result["variables"],
         out=result["out"],
+        wall=result.get("wall", 0.0),
+        cpu=result.get("cpu", 0.0),
+        log=result.get("log"),
+        memory=result.get("memory", 0),
+        rss=result.get("rss", 0),
+        allocations=result.get("allocations"),
+        budget=result.get("budget"),
+        setup=result.get("setup", 0.0),
         test=Test(
             name=result["test"]["name"],
             doc=result["test"]["doc"],
@@ -41,35 +62,196 @@ def _read_error(result: dict) -> Error:
     return error
 
 
-# load json into list of results
-def load_results(path: str) -> tuple[list[Error], str]:
+def results_file(path: str) -> str:
+    """The results of the last run: the streamed file when it is newer than the json one."""
+    json_file = os.path.join(path, RESULTS_FILE)
+    stream_file = os.path.join(path, STREAM_FILE)
+    if not os.path.exists(stream_file):
+        return json_file
+    if os.path.exists(json_file) and os.path.getmtime(json_file) > os.path.getmtime(
+        stream_file
+    ):
+        return json_file
+    return stream_file
+
+
+def _partial_summary(types: list[str]) -> str:
+    counts = [
+        f"{types.count(t)} {t.lower()}"
+        for t in ["Pass", "Failed", "Error", "Timeout", "Budget", "Warning"]
+        if types.count(t)
+    ]
+    return "JET: " + ", ".join(counts) + " (incomplete run)"
+
+
+def _read_stream(fp) -> dict:
+    """Reads a jet.results.jsonl, stopping at a line cut short by a killed run."""
+    tests, timings, summary = [], [], None
+    for line in fp:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            break
+        if "summary" in entry:
+            summary = entry["summary"]
+            continue
+        timings.append(
+            {
+                "name": entry["test"]["name"],
+                "module": entry["test"]["module"]["name"],
+                "path": entry["test"]["module"]["path"],
+                "type": entry["type"],
+                "wall": entry.get("wall", 0.0),
+                "cpu": entry.get("cpu", 0.0),
+                "memory": entry.get("memory", 0),
+                "rss": entry.get("rss", 0),
+                "setup": entry.get("setup", 0.0),
+            }
+        )
+        if entry["type"] != "Pass":
+            tests.append(entry)
+    if summary is None:
+        summary = _partial_summary([t["type"] for t in timings])
+    return {"summary": summary, "tests": tests, "timings": timings}
+
+
+def read_results(filename: str) -> dict:
+    """Summary, non passing tests and timings of a results file, json or json lines."""
+    with open(filename, "r") as f:
+        if filename.endswith(STREAM_FILE):
+            return _read_stream(f)
+        return json.load(f)
+
+
+def _load(path: str) -> dict:
     try:
-        with open(path + "/jet.results.json", "r") as f:
-            results = json.load(f)
+        return read_results(results_file(path))
     except FileNotFoundError:
         raise JetError("No results to diagnose found. Run jet run to run tests")
 
+
+# load json into list of results
+def load_results(path: str) -> tuple[list[Error], str]:
+    results = _load(path)
     errors = [_read_error(res) for res in results["tests"]]
 
     return errors, results["summary"]
 
 
+def load_timings(path: str) -> list[dict]:
+    return _load(path).get("timings", [])
+
+
+def load_bench(path: str) -> dict:
+    try:
+        with open(os.path.join(path, BENCH_FILE), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise JetError("No benchmark results found. Run jet bench to run benchmarks")
+
+
+def _entry(result: dict, offset: int, length: int) -> ResultEntry:
+    return ResultEntry(
+        offset=offset,
+        length=length,
+        name=result["test"]["name"],
+        module=result["test"]["module"]["name"],
+        path=result["test"]["module"]["path"],
+        type=result["type"],
+        description=result["description"][:INDEX_DESCRIPTION],
+    )
+
+
+def _scan_stream(filename: str) -> tuple[list[ResultEntry], str]:
+    entries, types, summary = [], [], None
+    with open(filename, "rb") as f:
+        offset = 0
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                break
+            if "summary" in result:
+                summary = result["summary"]
+            else:
+                types.append(result["type"])
+                if result["type"] != "Pass":
+                    entries.append(_entry(result, offset, len(line.rstrip(b"\n"))))
+            offset += len(line)
+    return entries, summary or _partial_summary(types)
+
+
+def _scan_json(filename: str) -> tuple[list[ResultEntry], str]:
+    # results are written with ascii escapes, so text and byte offsets are the same
+    with open(filename, "r") as f:
+        text = f.read()
+    decoder = json.JSONDecoder()
+    entries = []
+    position = text.index("[", text.index('"tests"')) + 1
+    while True:
+        while text[position] in ", \n":
+            position += 1
+        if text[position] == "]":
+            break
+        result, end = decoder.raw_decode(text, position)
+        entries.append(_entry(result, position, end - position))
+        position = end
+    return entries, json.loads(text)["summary"]
+
+
+def load_index(path: str) -> tuple[list[ResultEntry], str, str]:
+    """Lists the non passing tests of the last run without decoding them.
+    Returns the entries, the summary and the results file they point into.
+    The index is rebuilt, and saved, when missing or older than the results file.
+    """
+    filename = results_file(path)
+    if not os.path.exists(filename):
+        raise JetError("No results to diagnose found. Run jet run to run tests")
+    try:
+        with open(filename + INDEX_SUFFIX, "r") as f:
+            index = json.load(f)
+        if index["size"] == os.path.getsize(filename) and index[
+            "mtime"
+        ] == os.path.getmtime(filename):
+            entries = [ResultEntry(*row) for row in index["entries"]]
+            return entries, index["summary"], filename
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+
+    if filename.endswith(STREAM_FILE):
+        entries, summary = _scan_stream(filename)
+    else:
+        entries, summary = _scan_json(filename)
+    try:
+        write_index(filename, summary, [astuple(entry) for entry in entries])
+    except OSError:
+        pass
+    return entries, summary, filename
+
+
+def read_entry(filename: str, entry: ResultEntry) -> Error:
+    """Decodes a single test of a results file."""
+    with open(filename, "rb") as f:
+        f.seek(entry.offset)
+        return _read_error(json.loads(f.read(entry.length)))
+
+
 # choose a single result#
 def choose_result(
-    results: list[Error], summary: str, foreground: str, background: str
-) -> Error:
+    entries: list[ResultEntry], summary: str, foreground: str, background: str
+) -> ResultEntry:
     choice = ui.choose(
         title_text=" Choose Report ",
-        titles=[res.test.name for res in results],
-        descriptions=[res.type + ": " + res.description for res in results],
+        titles=[entry.name for entry in entries],
+        descriptions=[entry.type + ": " + entry.description for entry in entries],
         summary=summary,
         limit=1,
         color=foreground,
         background=background,
+        # names repeat across modules, the position tells the entries apart
+        indices=True,
     )
-    for res in results:
-        if res.test.name == choice[0]:
-            return res
+    return entries[choice[0]]
 
 
 # map components to result
@@ -81,6 +263,12 @@ def create_report(error: Error, config: SeeConfig, color: str) -> list:
 
     if error.out:
         report.append(captured_output(error.out, config.text_width))
+    if error.log:
+        report.append(observation("Full Output: ", error.log, config.text_width))
+    if error.budget:
+        report.append(budget_usage(error, config.text_width))
+    if error.allocations:
+        report.append(allocations(error, config.text_width))
 
     if config.doc_width >= 95:
         report.append(
@@ -119,16 +307,110 @@ def display_report(doc: str, pad: int, color: int):
     )
 
 
+def display_log(error: Error) -> None:
+    if not error.log or not os.path.exists(error.log):
+        raise JetError(
+            "No full output kept for this test. Run jet run --keep-logs to keep it"
+        )
+    subprocess.run([os.environ.get("PAGER", "less"), error.log])
+
+
+def display_durations(timings: list[dict], color_dict: dict, console: Console):
+    table = Table(box=MINIMAL, header_style="dim")
+    table.add_column("Wall", justify="right")
+    table.add_column("Cpu", justify="right", style="dim")
+    # fixture setup and peak memory, when the run had them
+    setup = any(timing.get("setup") for timing in timings)
+    if setup:
+        table.add_column("Setup", justify="right", style="dim")
+    measured = any(timing.get("memory") for timing in timings)
+    if measured:
+        table.add_column("Memory", justify="right")
+    table.add_column("Test")
+    table.add_column("Module", style="dim")
+    for timing in sorted(timings, key=lambda t: t["wall"], reverse=True):
+        color = color_dict.get(timing["type"], "dim")
+        row = [f"[{color}]{timing['wall']:.3f}s[/{color}]", f"{timing['cpu']:.3f}s"]
+        if setup:
+            row.append(f"{timing.get('setup', 0.0):.3f}s")
+        if measured:
+            row.append(format_bytes(timing.get("memory", 0)))
+        table.add_row(*row, timing["name"], timing["module"])
+    console.print(table)
+
+
+def _seconds(t: float) -> str:
+    for unit, scale in [("s", 1), ("ms", 1e-3), ("us", 1e-6)]:
+        if t >= scale:
+            return f"{t / scale:.3f}{unit}"
+    return f"{t / 1e-9:.1f}ns"
+
+
+def bench_table(benchmarks: list[dict], color_dict: dict) -> Table:
+    table = Table(box=MINIMAL, header_style="dim")
+    table.add_column("Min", justify="right")
+    table.add_column("Median", justify="right")
+    table.add_column("IQR", justify="right", style="dim")
+    table.add_column("Rounds", justify="right", style="dim")
+    table.add_column("Baseline", justify="right")
+    table.add_column("Benchmark")
+    table.add_column("Module", style="dim")
+    for bench in benchmarks:
+        color = color_dict.get(bench["type"], "dim")
+        if bench["type"] == "Error":
+            error = f"[{color}]error[/{color}]"
+            table.add_row("", "", "", "", error, bench["name"], bench["module"])
+            continue
+        change = ""
+        if bench["change"] is not None:
+            change = f"[{color}]{bench['change']:+.1%}[/{color}]"
+        table.add_row(
+            _seconds(bench["min"]),
+            f"[{color}]{_seconds(bench['median'])}[/{color}]",
+            _seconds(bench["iqr"]),
+            f"{bench['rounds']} x {bench['number']}",
+            change,
+            bench["name"],
+            bench["module"],
+        )
+    return table
+
+
+def display_bench(bench: dict, color_dict: dict, console: Console):
+    console.print(bench_table(bench["benchmarks"], color_dict))
+    for entry in bench["benchmarks"]:
+        if entry["type"] == "Error":
+            color = color_dict["Error"]
+            console.print(f"[{color}]{entry['name']}[/{color}] {entry['error']}")
+    console.print(bench["summary"])
+
+
 def See(config: SeeConfig) -> None:
     color_dict = {
         "Pass": config.pass_color,
         "Failed": config.failed_color,
         "Error": config.error_color,
         "Warning": config.warning_color,
+        "Timeout": config.error_color,
+        "Budget": config.failed_color,
     }
 
-    results, summary = load_results(config.path)
-    result = choose_result(results, summary, config.foreground, config.background)
+    if config.bench:
+        color_dict["Regressed"] = config.failed_color
+        display_bench(load_bench(config.path), color_dict, config.console)
+        return
+
+    if config.durations:
+        timings = load_timings(config.path)
+        display_durations(timings, color_dict, config.console)
+        return
+
+    entries, summary, filename = load_index(config.path)
+    entry = choose_result(entries, summary, config.foreground, config.background)
+    result = read_entry(filename, entry)
+    if config.log:
+        display_log(result)
+        return
     color = color_dict[result.type]
     report = create_report(result, config, color)
     doc = print_report(report, config.doc_width, config.console)
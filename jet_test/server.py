@@ -0,0 +1,235 @@
+"""Warm worker daemon.
+`jet serve` keeps worker processes with the test modules already imported and listens on a
+local Unix socket. `jet run --server` sends its selection there and streams the results back.
+Messages are pickled, so the socket lives in a directory only the user can open, and
+both ends prove they know a random key kept next to it.
+"""
+# standard imports
+import hashlib
+import os
+import signal
+import stat
+import tempfile
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+from typing import Iterator
+
+# self imports
+import jet_test.runner as runner
+import jet_test.fixtures as fixtures
+from jet_test.cache import project_files
+from jet_test.parallel import Pool
+from jet_test.classes import ServeConfig, JetError, Test, Error
+
+# dependencies
+from rich.console import Console
+
+_generation = 0
+
+
+def _runtime_dir() -> str:
+    """Directory of the sockets and keys of the user, readable by the user alone."""
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if base and os.path.isdir(base):
+        directory = os.path.join(base, "jet")
+    else:
+        directory = os.path.join(tempfile.gettempdir(), f"jet-{os.getuid()}")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    # someone else may have made it first, to read the keys or plant a socket
+    info = os.lstat(directory)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or info.st_mode & 0o077
+    ):
+        raise JetError(f"{directory} must be a directory only you can access")
+    return directory
+
+
+def socket_path(path: str) -> str:
+    """Socket address of the server for a tests directory."""
+    digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:12]
+    return os.path.join(_runtime_dir(), f"jet-{digest}.sock")
+
+
+def _key_path(address: str) -> str:
+    return address.removesuffix(".sock") + ".key"
+
+
+def _read_key(address: str) -> bytes | None:
+    try:
+        with open(_key_path(address), "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_key(address: str) -> bytes:
+    """A new random key for the server at `address`, readable by the user alone."""
+    key = os.urandom(32)
+    path = _key_path(address)
+    if os.path.exists(path):
+        os.unlink(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+def _connect(address: str):
+    """Connection to the server at `address`, after checking it belongs to the user."""
+    if os.stat(address).st_uid != os.getuid():
+        raise JetError(f"{address} belongs to another user, refusing to connect")
+    key = _read_key(address)
+    if key is None:
+        raise FileNotFoundError(address)
+    return Client(address, family="AF_UNIX", authkey=key)
+
+
+def _preload(paths: list[str]) -> None:
+    # ctrl-c stops the server, which then shuts the workers down itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    for path in paths:
+        try:
+            runner._load_module(path)
+        except runner.ErrorDuringImport:
+            pass
+
+
+def _work(
+    test: Test,
+    generation: int,
+    files: set[str],
+    fd: bool = False,
+    logs: str | None = None,
+    measure: bool = False,
+    output=None,
+) -> Error:
+    """Runs a test in a warm worker, first dropping project modules if any file changed."""
+    global _generation
+    if generation != _generation:
+        # fixtures built by the old code go with it, there is no run to report to
+        fixtures.close()
+        runner._unload_modules(files)
+        _generation = generation
+    return runner.evaluate(test, fd, logs, measure, output=output)
+
+
+def _serve_client(connection, pool: Pool, state: dict) -> None:
+    with connection:
+        try:
+            units, timeout, fd, logs, measure = connection.recv()
+        except EOFError:
+            return
+        # the pool runs one selection at a time, other clients wait for their turn
+        with state["lock"]:
+            files = project_files(state["roots"])
+            if files != state["files"]:
+                # any change drops every project module, third party imports stay warm
+                state["generation"] += 1
+                state["changed"] = set(files) | set(state["files"])
+                state["files"] = files
+            generation, changed = state["generation"], state["changed"]
+
+            args = (generation, changed, fd, logs, measure)
+            outcomes = pool.run(units, args=args, timeout=timeout)
+            try:
+                for outcome in outcomes:
+                    connection.send(outcome)
+                connection.send(None)
+            except (BrokenPipeError, ConnectionResetError):
+                # stops the tests still running for a client that went away
+                outcomes.close()
+
+
+def _is_alive(address: str) -> bool:
+    try:
+        _connect(address).close()
+        return True
+    except (FileNotFoundError, ConnectionRefusedError):
+        return False
+    except AuthenticationError:
+        # something answers, but not with our key
+        return True
+
+
+def run_remote(
+    tests: list[Test],
+    path: str,
+    timeout: float | None = None,
+    fd: bool = False,
+    logs: str | None = None,
+    measure: bool = False,
+) -> Iterator[tuple[Test, Error]]:
+    """Sends tests to the server of the tests directory and yields (test, error) pairs."""
+    try:
+        connection = _connect(socket_path(path))
+    except (FileNotFoundError, ConnectionRefusedError):
+        raise JetError(f"No jet server running for {path}. Start one with jet serve")
+    except AuthenticationError:
+        raise JetError(f"The jet server for {path} did not know the key. Restart it")
+    with connection:
+        units = [Test(name=t.name, doc=t.doc, module=t.module) for t in tests]
+        connection.send((units, timeout, fd, logs, measure))
+        while (outcome := connection.recv()) is not None:
+            yield outcome
+
+
+def Serve(config: ServeConfig) -> None:
+    console = Console()
+    address = socket_path(config.path)
+    if _is_alive(address):
+        raise JetError(f"A jet server is already running for {config.path}")
+    if os.path.exists(address):
+        os.unlink(address)
+
+    # stop cleanly, removing the socket, when terminated as a background job
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    roots = [os.path.abspath(config.path), os.getcwd()]
+    modules = runner.get_modules(config.path, None, static=True)
+    state = {
+        "lock": threading.Lock(),
+        "roots": roots,
+        "files": project_files(roots),
+        "generation": 0,
+        "changed": set(),
+    }
+
+    # workers start now, so the first run finds them warm
+    pool = Pool(
+        config.n_jobs,
+        _work,
+        timeout_of=runner._timeout_of,
+        initializer=_preload,
+        initargs=([m.path for m in modules],),
+        finalizer=fixtures.close,
+    )
+    key = _write_key(address)
+    with Listener(address, family="AF_UNIX", authkey=key) as listener:
+        console.print(
+            f"Serving {len(modules)} modules from {config.path} "
+            f"with {config.n_jobs} workers on {address}"
+        )
+        try:
+            while True:
+                try:
+                    connection = listener.accept()
+                except (AuthenticationError, EOFError, ConnectionError):
+                    # a client without the key, or one that left during the handshake
+                    continue
+                threading.Thread(
+                    target=_serve_client,
+                    args=(connection, pool, state),
+                    daemon=True,
+                ).start()
+        except KeyboardInterrupt:
+            # a second signal must not cut the shutdown of the workers short
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+            for test, error in pool.close():
+                console.print(f"{test.name} failed: {error.name}: {error.description}")
+            if os.path.exists(_key_path(address)):
+                os.unlink(_key_path(address))
+            console.print("Server stopped")
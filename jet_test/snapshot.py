@@ -0,0 +1,95 @@
+"""Failure snapshots.
+Captures the local variables of the failing test frame as small, JSON ready previews,
+without reading source files or building the repr of large objects in full.
+"""
+# standard imports
+import os
+import reprlib
+from types import FrameType, TracebackType
+from typing import Any
+
+# characters allowed for a single value and for all the values of a test
+VALUE_BUDGET = 200
+TEST_BUDGET = 4000
+# longest list or dict kept as is when its items are plain scalars
+MAX_ITEMS = 20
+
+_SCALARS = (bool, int, float, type(None))
+
+_repr = reprlib.Repr()
+_repr.maxstring = VALUE_BUDGET
+_repr.maxother = VALUE_BUDGET
+_repr.maxlist = _repr.maxtuple = _repr.maxset = _repr.maxdict = MAX_ITEMS
+
+
+def innermost(tb: TracebackType, path: str) -> tuple[FrameType, int]:
+    """Deepest frame of the traceback that runs code of the test module, or the deepest
+    frame when none does, with the line it was executing."""
+    path = os.path.abspath(path)
+    deepest = match = None
+    while tb is not None:
+        deepest = tb
+        if os.path.abspath(tb.tb_frame.f_code.co_filename) == path:
+            match = tb
+        tb = tb.tb_next
+    chosen = match or deepest
+    return chosen.tb_frame, chosen.tb_lineno
+
+
+def _truncate(text: str, budget: int) -> str:
+    if len(text) <= budget:
+        return text
+    return text[:budget] + f"... ({len(text)} chars)"
+
+
+def _is_plain(value: Any) -> bool:
+    return isinstance(value, _SCALARS) or (
+        isinstance(value, str) and len(value) <= VALUE_BUDGET
+    )
+
+
+def preview(value: Any, budget: int = VALUE_BUDGET) -> Any:
+    """JSON ready preview of a value that never exceeds `budget` characters by much."""
+    if isinstance(value, _SCALARS):
+        return value
+    if isinstance(value, str):
+        return _truncate(value, budget)
+    if hasattr(value, "__name__") and not hasattr(value, "shape"):
+        return value.__name__
+    if hasattr(value, "shape"):
+        # arrays, tensors and data frames, summarized without their data
+        kind = type(value).__name__
+        dtype = getattr(value, "dtype", None)
+        shape = getattr(value, "shape")
+        text = f"{kind}(shape={tuple(shape) if shape is not None else None}"
+        return text + (f", dtype={dtype})" if dtype is not None else ")")
+    if isinstance(value, (list, tuple)) and len(value) <= MAX_ITEMS:
+        if all(_is_plain(v) for v in value):
+            return list(value)
+    if isinstance(value, dict) and len(value) <= MAX_ITEMS:
+        if all(isinstance(k, str) and _is_plain(v) for k, v in value.items()):
+            return dict(value)
+    try:
+        text = _repr.repr(value)
+    except Exception as exception:
+        text = f"<{type(value).__name__}: repr failed with {type(exception).__name__}>"
+    if hasattr(value, "__len__") and not isinstance(value, type):
+        try:
+            text = f"{type(value).__name__}(len={len(value)}) {text}"
+        except Exception:
+            pass
+    return _truncate(text, budget)
+
+
+def capture(variables: dict | None, budget: int = TEST_BUDGET) -> dict:
+    """Previews of every local variable until the test budget runs out."""
+    if not variables:
+        return variables
+    captured = {}
+    for k, v in variables.items():
+        if budget <= 0:
+            captured[k] = "..."
+            continue
+        captured[k] = preview(v, min(VALUE_BUDGET, budget))
+        budget -= len(str(captured[k]))
+    return captured
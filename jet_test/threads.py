@@ -0,0 +1,74 @@
+"""Thread pool execution.
+Runs tests that spend their time waiting, on services or subprocesses, in threads of the
+runner itself: every module is imported once and many tests wait at the same time.
+Every thread writes to its own output capture, sys.stdout is shared but routed per thread.
+"""
+# standard imports
+import concurrent.futures
+import io
+import time
+from typing import Iterator
+
+# self imports
+import jet_test.runner as runner
+import jet_test.capture as capture
+import jet_test.fixtures as fixtures
+from jet_test.classes import Test, Error
+
+# threads used for tests opted in when --threads is not given
+THREADS = 8
+
+
+def _evaluate(test: Test, logs: str | None) -> Error:
+    output = io.StringIO()
+    token = capture.context_output.set(output)
+    stopwatch = runner.Stopwatch(clock=time.thread_time)
+    used = fixtures.Fixtures(test)
+    try:
+        with used, stopwatch:
+            runner._call(test.routine, **used.kwargs)
+    except Exception as exception:
+        error = runner._verdict(test, exception, output, logs, stopwatch, used)
+    else:
+        error = runner._verdict(test, None, output, logs, stopwatch, used)
+    finally:
+        # pool threads keep their context from one test to the next
+        capture.context_output.reset(token)
+    return error
+
+
+def run_threads(
+    tests: list[Test], n_threads: int = THREADS, logs: str | None = None
+) -> Iterator[tuple[Test, Error]]:
+    """Yields (test, error) pairs in order of completion.
+    Modules are imported here, before a test reaches a thread, so no two threads import
+    the same module.
+    """
+    if not tests:
+        return
+    queue = iter(tests)
+    running = {}
+    with capture.ContextCapture(), concurrent.futures.ThreadPoolExecutor(
+        max_workers=n_threads, thread_name_prefix="jet"
+    ) as executor:
+        try:
+            while True:
+                for test in queue:
+                    test, error = runner._prepare(test)
+                    if error is not None:
+                        yield test, error
+                        continue
+                    running[executor.submit(_evaluate, test, logs)] = test
+                    if len(running) >= 2 * n_threads:
+                        break
+                if not running:
+                    break
+                done, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    yield running.pop(future), future.result()
+        finally:
+            # a run stopped early does not start the tests still queued
+            for future in running:
+                future.cancel()
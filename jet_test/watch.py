@@ -0,0 +1,107 @@
+"""Watch mode.
+Keeps the collected tests in memory and re-runs the ones affected by file changes.
+"""
+# standard imports
+import os
+import time
+
+# self imports
+import jet_test.runner as runner
+import jet_test.collect as collect
+import jet_test.cache as cache
+from jet_test.classes import RunConfig, Test, Error
+
+
+def _changed(before: dict[str, int], after: dict[str, int]) -> set[str]:
+    return {
+        path
+        for path in set(before) | set(after)
+        if before.get(path) != after.get(path)
+    }
+
+
+def _key(test: Test) -> tuple[str, str]:
+    return os.path.abspath(test.module.path), test.name
+
+
+def _affected(tests: list[Test], changed: set[str], roots: list[str]) -> list[Test]:
+    """Tests in changed modules or in modules importing a changed module."""
+    affected = []
+    for test in tests:
+        path = os.path.abspath(test.module.path)
+        if path in changed or changed.intersection(cache.dependencies(path, roots)):
+            affected.append(test)
+    return affected
+
+
+def _recollect(config: RunConfig, paths: set[str]) -> list[Test]:
+    """Collects again the selected modules, plus new ones when running everything."""
+    modules = runner.get_modules(config.path, config.files, static=config.static)
+    modules = [
+        m for m in modules if os.path.abspath(m.path) in paths or config.run_all
+    ]
+    tests = runner.get_routines(modules)
+    if config.static:
+        collect.save_index(config.path)
+    return tests
+
+
+def _summary(tests: list[Test], results: dict, color_dict: dict) -> str:
+    """Summary of the latest result of every test, tests never run count as passed."""
+    tracker = runner._new_tracker(len(tests))
+    for error in results.values():
+        tracker = runner._track(error, tracker)
+    tracker["Pass"] += len(tests) - len(results)
+    _, summary = runner.build_summary(tracker, color_dict)
+    return summary
+
+
+def watch(
+    config: RunConfig,
+    tests: list[Test],
+    results: list[Error],
+    color_dict: dict,
+    interval: float = 0.5,
+) -> None:
+    """Polls the tests directory and the project sources until interrupted."""
+    roots = [os.path.abspath(config.path), os.getcwd()]
+    errors = {_key(error.test): error for error in results}
+    snapshot = cache.project_files(roots)
+    try:
+        while True:
+            time.sleep(interval)
+            current = cache.project_files(roots)
+            changed = _changed(snapshot, current)
+            if not changed:
+                continue
+            snapshot = current
+
+            cache.forget(changed)
+            collect.forget(changed)
+            paths = {os.path.abspath(t.module.path) for t in tests}
+            stale = changed | {
+                path
+                for path in paths
+                if changed.intersection(cache.dependencies(path, roots))
+            }
+            runner._unload_modules(stale)
+
+            try:
+                tests = _recollect(config, paths)
+            except (collect.ErrorDuringParse, runner.ErrorDuringImport) as exception:
+                print(exception)
+                continue
+            known = {_key(t) for t in tests}
+            errors = {k: v for k, v in errors.items() if k in known}
+            rerun = _affected(tests, changed, roots)
+            if not rerun:
+                continue
+
+            new_results, _ = runner._run(rerun, config, color_dict)
+            errors.update({_key(error.test): error for error in new_results})
+            writer = runner._writer(config)
+            for error in errors.values():
+                writer.write(error)
+            writer.close(_summary(tests, errors, color_dict))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,241 @@
+"""Results writers.
+Every finished test is handed to the writers of the run, which store it in their own format.
+"""
+# standard imports
+import json
+import os
+import re
+from dataclasses import asdict
+from xml.sax.saxutils import escape, quoteattr
+
+# self imports
+from jet_test.classes import Error
+
+RESULTS_FILE = "jet.results.json"
+STREAM_FILE = "jet.results.jsonl"
+BENCH_FILE = "jet.bench.json"
+INDEX_SUFFIX = ".idx"
+
+# characters of the description kept in the index, enough for the picker
+INDEX_DESCRIPTION = 200
+
+
+def _timing(result: Error) -> dict:
+    return {
+        "name": result.test.name,
+        "module": result.test.module.name,
+        "path": result.test.module.path,
+        "type": result.type,
+        "wall": result.wall,
+        "cpu": result.cpu,
+        "memory": result.memory,
+        "rss": result.rss,
+        "setup": result.setup,
+    }
+
+
+def _index_row(result: Error, offset: int, length: int) -> list:
+    return [
+        offset,
+        length,
+        result.test.name,
+        result.test.module.name,
+        result.test.module.path,
+        result.type,
+        result.description[:INDEX_DESCRIPTION],
+    ]
+
+
+def write_index(filename: str, summary: str, rows: list[list]) -> None:
+    """Writes the index of a results file: byte offset and length of every non passing
+    test, with just what is needed to list it."""
+    index = {
+        "size": os.path.getsize(filename),
+        "mtime": os.path.getmtime(filename),
+        "summary": summary,
+        "entries": rows,
+    }
+    with open(filename + INDEX_SUFFIX, "w") as fp:
+        json.dump(index, fp)
+
+
+class JsonWriter:
+    """Writes jet.results.json once the run is over, and its index.
+    Entries are serialized one at a time so the results are never held twice in memory.
+    """
+
+    def __init__(self, path: str):
+        self.filename = os.path.join(path, RESULTS_FILE)
+        self.results = []
+
+    def write(self, result: Error) -> None:
+        self.results.append(result)
+
+    def close(self, summary: str) -> None:
+        rows = []
+        with open(self.filename, "wb") as fp:
+            fp.write(b'{"summary": ' + json.dumps(summary).encode() + b', "tests": [')
+            failures = (r for r in self.results if r.type != "Pass")
+            for i, result in enumerate(failures):
+                entry = json.dumps(asdict(result)).encode()
+                fp.write(b", " if i else b"")
+                rows.append(_index_row(result, fp.tell(), len(entry)))
+                fp.write(entry)
+            fp.write(b'], "timings": [')
+            for i, result in enumerate(self.results):
+                fp.write(b", " if i else b"")
+                fp.write(json.dumps(_timing(result)).encode())
+            fp.write(b"]}")
+        write_index(self.filename, summary, rows)
+
+
+class JsonLinesWriter:
+    """Streams jet.results.jsonl: one line per finished test, flushed as soon as it is
+    written, and a last line with the summary. A killed run still leaves every finished test.
+    The index is written at the end, `jet see` rebuilds it if the run never got there.
+    """
+
+    def __init__(self, path: str):
+        self.filename = os.path.join(path, STREAM_FILE)
+        self.fp = open(self.filename, "wb")
+        self.rows = []
+
+    def write(self, result: Error) -> None:
+        line = json.dumps(asdict(result)).encode()
+        if result.type != "Pass":
+            self.rows.append(_index_row(result, self.fp.tell(), len(line)))
+        self.fp.write(line + b"\n")
+        self.fp.flush()
+
+    def close(self, summary: str) -> None:
+        self.fp.write(json.dumps({"summary": summary}).encode() + b"\n")
+        self.fp.close()
+        write_index(self.filename, summary, self.rows)
+
+
+# characters XML 1.0 does not allow, e.g. terminal escapes in captured output
+_INVALID_XML = re.compile(
+    "[^\x09\x0a\x0d\x20-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]"
+)
+
+_JUNIT_TAGS = {
+    "Failed": "failure",
+    "Warning": "failure",
+    "Error": "error",
+    "Timeout": "error",
+    "Budget": "failure",
+}
+
+# room left in the opening tag for the counts, rewritten in place as tests finish
+_JUNIT_HEADER = 160
+
+
+def _xml(text) -> str:
+    return escape(_INVALID_XML.sub("", str(text)))
+
+
+def _attribute(text) -> str:
+    return quoteattr(_INVALID_XML.sub("", str(text)))
+
+
+def _failure_text(result: Error) -> str:
+    lines = [f"{result.test.module.path}:{result.line}", result.description]
+    lines.extend(f"{k} = {v}" for k, v in (result.variables or {}).items())
+    return "\n".join(lines)
+
+
+class JUnitWriter:
+    """Streams a JUnit XML report, one testcase per finished test.
+    The closing tags are rewritten after every test, so a cancelled job still leaves a
+    valid report with every finished test.
+    """
+
+    _TAIL = b"</testsuite>\n</testsuites>\n"
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.fp = open(filename, "wb")
+        self.counts = {"tests": 0, "failures": 0, "errors": 0}
+        self.time = 0.0
+        self.fp.write(b'<?xml version="1.0" encoding="utf-8"?>\n<testsuites>\n')
+        self.header = self.fp.tell()
+        self._write_header()
+        self.end = self.fp.tell()
+        self.fp.write(self._TAIL)
+        self.fp.flush()
+
+    def _write_header(self) -> None:
+        counts = " ".join(f'{k}="{v}"' for k, v in self.counts.items())
+        tag = f'<testsuite name="jet" {counts} time="{self.time:.3f}"'
+        self.fp.seek(self.header)
+        self.fp.write(tag.ljust(_JUNIT_HEADER).encode() + b">\n")
+
+    def write(self, result: Error) -> None:
+        self.counts["tests"] += 1
+        self.time += result.wall
+        tag = _JUNIT_TAGS.get(result.type)
+        if tag is not None:
+            self.counts["errors" if tag == "error" else "failures"] += 1
+
+        test = result.test
+        case = (
+            f"<testcase classname={_attribute(test.module.name)} "
+            f"name={_attribute(test.name)} file={_attribute(test.module.path)} "
+            f'time="{result.wall:.6f}"'
+        )
+        if tag is None:
+            case += "/>\n"
+        else:
+            case += f' line="{result.line}">\n'
+            case += f"<{tag} type={_attribute(result.name)} "
+            case += f"message={_attribute(result.description)}>"
+            case += f"{_xml(_failure_text(result))}</{tag}>\n"
+            if result.out:
+                case += f"<system-out>{_xml(result.out)}</system-out>\n"
+            case += "</testcase>\n"
+
+        self._write_header()
+        self.fp.seek(self.end)
+        self.fp.write(case.encode())
+        self.end = self.fp.tell()
+        self.fp.write(self._TAIL)
+        self.fp.flush()
+
+    def close(self, summary: str) -> None:
+        self.fp.close()
+
+
+class TapWriter:
+    """Streams a TAP version 13 report, with the plan at the end."""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.fp = open(filename, "w")
+        self.n = 0
+        self.fp.write("TAP version 13\n")
+        self.fp.flush()
+
+    def write(self, result: Error) -> None:
+        self.n += 1
+        test = result.test
+        status = "ok" if result.type == "Pass" else "not ok"
+        self.fp.write(f"{status} {self.n} - {test.module.name}: {test.name}\n")
+        if result.type != "Pass":
+            diagnostic = {
+                "type": result.type,
+                "message": result.description,
+                "at": f"{test.module.path}:{result.line}",
+                "duration_ms": round(result.wall * 1000, 3),
+            }
+            if result.out:
+                diagnostic["output"] = result.out
+            self.fp.write("  ---\n")
+            for key, value in diagnostic.items():
+                # json strings are valid yaml scalars, and keep the block on one line each
+                self.fp.write(f"  {key}: {json.dumps(value)}\n")
+            self.fp.write("  ...\n")
+        self.fp.flush()
+
+    def close(self, summary: str) -> None:
+        self.fp.write(f"1..{self.n}\n# {summary}\n")
+        self.fp.close()
@@ -0,0 +1,31 @@
+"""Examples of budgets.
+A test over its wall, cpu or memory budget is reported as Budget, and its report shows
+what it used next to what it was allowed.
+"""
+
+import os
+
+from jet_test import budget
+from jet_test.memory import MemoryMeter
+
+
+def _allocate():
+    data = [bytes(1000) for _ in range(2000)]
+    return len(data)
+
+
+@budget(memory=64 * 2**20)
+def test_stays_within_its_memory_budget():
+    """Allocating 2 MB fits in a 64 MB budget."""
+    assert _allocate() == 2000
+
+
+def test_memory_breach_lists_where_the_memory_went():
+    """A test over its memory budget keeps the lines that allocated the memory."""
+    meter = MemoryMeter(limit=2**20, routine=_allocate)
+    with meter:
+        _allocate()
+    assert meter.peak > 2**20, "the allocation should go over the limit"
+    assert meter.sites, "the breach should list where the memory went"
+    site = os.path.basename(meter.sites[0][0])
+    assert site.startswith("test_budgets.py:"), f"unexpected top site {site}"
@@ -0,0 +1,44 @@
+"""Examples of fixtures.
+A test asks for a fixture by naming it as a parameter; arguments filled in by decorators
+such as mock.patch are left to them.
+"""
+
+import os
+from unittest import mock
+
+from jet_test import fixture
+
+
+@fixture(scope="module")
+def numbers():
+    return [3, 1, 2]
+
+
+@fixture
+def ordered(numbers):
+    yield sorted(numbers)
+    # code after the yield tears the fixture down once the test is over
+
+
+def test_fixture_is_passed_by_name(ordered):
+    """Fixtures are built from the parameters of the test."""
+    assert ordered == [1, 2, 3], "the fixture should give the sorted numbers"
+
+
+def test_fixtures_can_use_other_fixtures(numbers, ordered):
+    """A fixture can ask for other fixtures, and each is built once per scope."""
+    assert sorted(numbers) == ordered
+
+
+@mock.patch("os.getcwd", return_value="/patched")
+def test_mock_patch_arguments_are_not_fixtures(getcwd):
+    """Arguments that mock.patch fills in are not looked up as fixtures."""
+    assert os.getcwd() == "/patched"
+    getcwd.assert_called_once()
+
+
+@mock.patch("os.getcwd", return_value="/patched")
+def test_fixtures_follow_mock_patch_arguments(getcwd, ordered):
+    """A patched test gets its mocks first, then the fixtures it names after them."""
+    assert os.getcwd() == "/patched"
+    assert ordered == [1, 2, 3], "the fixture should give the sorted numbers"